@@ -0,0 +1,7 @@
+"""Lox embedded in Python, see embedding.py.
+
+The modules import each other relative to this package, `python lox/lox.py`
+imports the package before it imports them.
+"""
+from .embedding import EmbeddedFunction, Program, compile
+from .exceptions import LoxCompileError, LoxRuntimeError
@@ -1,9 +1,9 @@
-from stmt import Block, Expression, Function, If, Print, Return, Stmt, StmtVisitor, Var, While
+from .stmt import Block, Expression, Function, If, Import, Print, Return, Stmt, StmtVisitor, Var, While
 from typing import List
 import attr
-from expr import Assign, Binary, Call, Expr, Grouping, Literal, Unary, ExprVisitor, Variable
-from token_type import TokenType
-from tokens import Token
+from .expr import Assign, Binary, Call, Expr, Grouping, Literal, Unary, ExprVisitor, Variable
+from .token_type import TokenType
+from .tokens import Token
 
 
 @attr.s(auto_attribs=True)
@@ -47,6 +47,9 @@ class AstPrinter(ExprVisitor[str], StmtVisitor[None]):
             print("else")
             self.print_statement(stmt.else_branch)
         
+    def visit_import_stmt(self, stmt: Import):
+        print(f"(import {stmt.path.lexeme})")
+
     def visit_print_stmt(self, stmt: Print):
         print(self.parenthesize("print", stmt.expression))
 
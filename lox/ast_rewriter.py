@@ -0,0 +1,107 @@
+from typing import List
+from .expr import Assign, Binary, Call, Expr, ExprVisitor, Get, Grouping, Literal, Logical, Set, Super, This, Unary, Variable
+from .stmt import Block, Break, Class, Expression, Function, If, Import, Print, Return, Stmt, StmtVisitor, Var, While
+
+
+class AstRewriter(ExprVisitor[Expr], StmtVisitor[None]):
+    """Walks statements in place, replacing every expression with whatever its
+    visit method returns. Passes override the nodes they care about."""
+    def rewrite_statements(self, statements: List[Stmt]):
+        for statement in statements:
+            self.rewrite_stmt(statement)
+
+    def rewrite(self, expr: Expr) -> Expr:
+        return expr.accept(self)
+
+    def rewrite_stmt(self, stmt: Stmt):
+        stmt.accept(self)
+
+    def visit_block_stmt(self, stmt: Block):
+        for statement in stmt.statements:
+            self.rewrite_stmt(statement)
+
+    def visit_break_stmt(self, stmt: Break):
+        return
+
+    def visit_class_stmt(self, stmt: Class):
+        for method in stmt.methods:
+            self.visit_function_stmt(method)
+
+    def visit_expression_stmt(self, stmt: Expression):
+        stmt.expression = self.rewrite(stmt.expression)
+
+    def visit_function_stmt(self, stmt: Function):
+        for statement in stmt.body:
+            self.rewrite_stmt(statement)
+
+    def visit_if_stmt(self, stmt: If):
+        stmt.condition = self.rewrite(stmt.condition)
+        self.rewrite_stmt(stmt.then_branch)
+        if stmt.else_branch is not None:
+            self.rewrite_stmt(stmt.else_branch)
+
+    def visit_import_stmt(self, stmt: Import):
+        return
+
+    def visit_print_stmt(self, stmt: Print):
+        stmt.expression = self.rewrite(stmt.expression)
+
+    def visit_return_stmt(self, stmt: Return):
+        if stmt.value is not None:
+            stmt.value = self.rewrite(stmt.value)
+
+    def visit_var_stmt(self, stmt: Var):
+        if stmt.initializer is not None:
+            stmt.initializer = self.rewrite(stmt.initializer)
+
+    def visit_while_stmt(self, stmt: While):
+        stmt.condition = self.rewrite(stmt.condition)
+        self.rewrite_stmt(stmt.body)
+
+    def visit_assign_expr(self, expr: Assign) -> Expr:
+        expr.value = self.rewrite(expr.value)
+        return expr
+
+    def visit_binary_expr(self, expr: Binary) -> Expr:
+        expr.left = self.rewrite(expr.left)
+        expr.right = self.rewrite(expr.right)
+        return expr
+
+    def visit_call_expr(self, expr: Call) -> Expr:
+        expr.callee = self.rewrite(expr.callee)
+        expr.arguments = [self.rewrite(argument) for argument in expr.arguments]
+        return expr
+
+    def visit_get_expr(self, expr: Get) -> Expr:
+        expr.object = self.rewrite(expr.object)
+        return expr
+
+    def visit_grouping_expr(self, expr: Grouping) -> Expr:
+        expr.expression = self.rewrite(expr.expression)
+        return expr
+
+    def visit_literal_expr(self, expr: Literal) -> Expr:
+        return expr
+
+    def visit_logical_expr(self, expr: Logical) -> Expr:
+        expr.left = self.rewrite(expr.left)
+        expr.right = self.rewrite(expr.right)
+        return expr
+
+    def visit_set_expr(self, expr: Set) -> Expr:
+        expr.object = self.rewrite(expr.object)
+        expr.value = self.rewrite(expr.value)
+        return expr
+
+    def visit_super_expr(self, expr: Super) -> Expr:
+        return expr
+
+    def visit_this_expr(self, expr: This) -> Expr:
+        return expr
+
+    def visit_unary_expr(self, expr: Unary) -> Expr:
+        expr.right = self.rewrite(expr.right)
+        return expr
+
+    def visit_variable_expr(self, expr: Variable) -> Expr:
+        return expr
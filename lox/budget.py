@@ -0,0 +1,73 @@
+import time
+from typing import Optional
+from .exceptions import BreakStmtException, LoxRuntimeError
+from .stmt import While
+from .tokens import Token
+
+
+class Budget:
+    """Limits for running untrusted programs.
+
+    A step is one loop iteration or one call, tail calls included, which is
+    all a program needs to run for long. Installing replaces the
+    interpreter's while loop and adds a call hook, so the limits are only
+    checked at loop back-edges and calls, and an interpreter without a
+    budget pays nothing. The clock is read at every step, a single step can
+    take long when it calls a native. Whoever runs a program calls reset
+    first, the timeout counts from there.
+    """
+    def __init__(self, max_steps: Optional[int] = None, timeout: Optional[float] = None,
+                 max_depth: Optional[int] = None):
+        self.max_steps = max_steps
+        self.timeout = timeout
+        self.max_depth = max_depth
+        self.steps = 0
+        self.deadline: Optional[float] = None
+
+    def install(self, interpreter: "Interpreter"):
+        interpreter.budget = self
+        self.reset()
+        self.install_loops(interpreter)
+        interpreter.add_hook("call", self.on_call)
+
+    def reset(self):
+        """Starts the budget over, for the next program run by the same interpreter."""
+        self.steps = 0
+        self.deadline = None if self.timeout is None else time.monotonic() + self.timeout
+
+    def install_loops(self, interpreter: "Interpreter"):
+        is_truthy = interpreter.is_truthy
+
+        # execute is looked up each time, node hooks may replace it
+        def visit_while_stmt(stmt: While):
+            try:
+                while is_truthy(interpreter.evaluate(stmt.condition)):
+                    interpreter.execute(stmt.body)
+                    self.charge(stmt.keyword)
+            except BreakStmtException:
+                pass
+        interpreter.visit_while_stmt = visit_while_stmt
+
+        steps = getattr(interpreter, "steps", None)
+        if steps is not None:
+            # the stackless interpreter runs loops that contain calls itself
+            def step_while_stmt(stmt: While):
+                try:
+                    while is_truthy((yield stmt.condition)):
+                        yield stmt.body
+                        self.charge(stmt.keyword)
+                except BreakStmtException:
+                    pass
+            steps.visit_while_stmt = step_while_stmt
+
+    def on_call(self, name: str, call_site: Optional[Token], depth: int):
+        if self.max_depth is not None and depth > self.max_depth:
+            raise LoxRuntimeError(call_site, "Call depth limit exceeded.")
+        self.charge(call_site)
+
+    def charge(self, token: Token):
+        self.steps += 1
+        if self.max_steps is not None and self.steps > self.max_steps:
+            raise LoxRuntimeError(token, "Step limit exceeded.")
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise LoxRuntimeError(token, "Time limit exceeded.")
@@ -0,0 +1,155 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from .source_map import Report, Source, SourceMap
+from .tokens import Token
+from .token_type import TokenType
+
+SINGLE: Dict[int, TokenType] = {
+    ord("("): TokenType.LEFT_PAREN,
+    ord(")"): TokenType.RIGHT_PAREN,
+    ord("{"): TokenType.LEFT_BRACE,
+    ord("}"): TokenType.RIGHT_BRACE,
+    ord(","): TokenType.COMMA,
+    ord("."): TokenType.DOT,
+    ord("-"): TokenType.MINUS,
+    ord("+"): TokenType.PLUS,
+    ord(";"): TokenType.SEMICOLON,
+    ord("*"): TokenType.STAR,
+}
+
+# one character, or the same followed by "="
+ONE_OR_TWO: Dict[int, Tuple[TokenType, TokenType]] = {
+    ord("!"): (TokenType.BANG, TokenType.BANG_EQUAL),
+    ord("="): (TokenType.EQUAL, TokenType.EQUAL_EQUAL),
+    ord("<"): (TokenType.LESS, TokenType.LESS_EQUAL),
+    ord(">"): (TokenType.GREATER, TokenType.GREATER_EQUAL),
+}
+
+KEYWORDS: Dict[bytes, TokenType] = {
+    b"and": TokenType.AND,
+    b"break": TokenType.BREAK,
+    b"class": TokenType.CLASS,
+    b"else": TokenType.ELSE,
+    b"false": TokenType.FALSE,
+    b"for": TokenType.FOR,
+    b"fun": TokenType.FUN,
+    b"if": TokenType.IF,
+    b"import": TokenType.IMPORT,
+    b"nil": TokenType.NIL,
+    b"or": TokenType.OR,
+    b"print": TokenType.PRINT,
+    b"return": TokenType.RETURN,
+    b"super": TokenType.SUPER,
+    b"this": TokenType.THIS,
+    b"true": TokenType.TRUE,
+    b"var": TokenType.VAR,
+    b"while": TokenType.WHILE
+}
+
+# tokens whose text never varies share one lexeme instead of pointing into the source
+LEXEMES: Dict[TokenType, str] = {TokenType.SLASH: "/"}
+LEXEMES.update((token_type, chr(c)) for c, token_type in SINGLE.items())
+LEXEMES.update((one, chr(c)) for c, (one, two) in ONE_OR_TWO.items())
+LEXEMES.update((two, chr(c) + "=") for c, (one, two) in ONE_OR_TWO.items())
+LEXEMES.update((token_type, keyword.decode()) for keyword, token_type in KEYWORDS.items())
+
+WHITESPACE = frozenset(b" \r\t\n")
+SLASH, QUOTE, EQUAL = ord("/"), ord('"'), ord("=")
+
+# the same ASCII letters, digits and underscore as Scanner
+IDENTIFIER = re.compile(rb"[A-Za-z_][A-Za-z0-9_]*")
+NUMBER = re.compile(rb"[0-9]+(\.[0-9]+)?")
+
+
+class SourceToken(Token):
+    """A token that keeps offsets into the source instead of its text, which
+    is decoded the first time something asks for the lexeme."""
+    __slots__ = ("token_type", "offset", "end", "literal", "source_map", "text")
+
+    def __init__(self, token_type: TokenType, offset: int, end: int, literal: Any, source_map: SourceMap):
+        self.token_type = token_type
+        self.offset = offset
+        self.end = end
+        self.literal = literal
+        self.source_map = source_map
+        self.text: Optional[str] = None
+
+    @property
+    def lexeme(self) -> str:
+        if self.text is None:
+            self.text = self.source_map.source[self.offset:self.end].decode("utf-8", "replace")
+        return self.text
+
+    def __reduce__(self):
+        # an mmap can't be pickled, a plain token with the text can
+        return Token, (self.token_type, self.lexeme, self.literal, self.offset, self.source_map)
+
+
+class ByteScanner():
+    """Scans UTF-8 source held as bytes or an mmap, so that a huge file never
+    has to be read into a str. Tokens point back into the source."""
+    def __init__(self, source: Source, report: Report):
+        self.report = report
+        self.source = source
+        self.source_map = SourceMap(source)
+        self.tokens: List[Token] = []
+
+    def scan_tokens(self) -> List[Token]:
+        source, tokens, source_map = self.source, self.tokens, self.source_map
+        end = len(source)
+        current = 0
+        while current < end:
+            start = current
+            c = source[current]
+            current += 1
+            if c in WHITESPACE:
+                continue
+            elif c in SINGLE:
+                token_type = SINGLE[c]
+                tokens.append(Token(token_type, LEXEMES[token_type], None, start, source_map))
+            elif c in ONE_OR_TWO:
+                one, two = ONE_OR_TWO[c]
+                if current < end and source[current] == EQUAL:
+                    current += 1
+                    tokens.append(Token(two, LEXEMES[two], None, start, source_map))
+                else:
+                    tokens.append(Token(one, LEXEMES[one], None, start, source_map))
+            elif c == SLASH:
+                if current < end and source[current] == SLASH:
+                    # a comment goes until the end of the line
+                    current = source.find(b"\n", current)
+                    if current == -1:
+                        current = end
+                else:
+                    tokens.append(Token(TokenType.SLASH, "/", None, start, source_map))
+            elif c == QUOTE:
+                current = source.find(b'"', current)
+                if current == -1:
+                    self.report(source_map, start, "", "Unterminated string.")
+                    current = end
+                    continue
+                current += 1
+                text = source[start + 1:current - 1].decode("utf-8", "replace")
+                tokens.append(SourceToken(TokenType.STRING, start, current, text, source_map))
+            elif 48 <= c <= 57:
+                match = NUMBER.match(source, start)
+                current = match.end()
+                tokens.append(SourceToken(TokenType.NUMBER, start, current, float(match.group()), source_map))
+            else:
+                match = IDENTIFIER.match(source, start)
+                if match is None:
+                    self.report(source_map, start, "", "Unexpected character.")
+                    # one report for the whole of a multi-byte character
+                    while current < end and 0x80 <= source[current] <= 0xbf:
+                        current += 1
+                    continue
+                current = match.end()
+                token_type = KEYWORDS.get(match.group(), None)
+                if token_type is None:
+                    tokens.append(SourceToken(TokenType.IDENTIFIER, start, current, None, source_map))
+                else:
+                    tokens.append(Token(token_type, LEXEMES[token_type], None, start, source_map))
+
+        tokens.append(Token(TokenType.EOF, "", None, end, source_map))
+        return tokens
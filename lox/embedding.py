@@ -0,0 +1,73 @@
+from typing import Any, Iterable, List, Optional, Sequence
+from .exceptions import LoxCompileError
+from .interpreter import Interpreter
+from .lox_callable import LoxCallable
+from .modules import compile_source
+from .tokens import Token
+
+
+class Program:
+    """A compiled Lox program that has run its top-level code, so that its
+    functions can be called from Python in the interpreter it ran in."""
+    def __init__(self, interpreter: Interpreter):
+        self.interpreter = interpreter
+
+    def get_function(self, name: str) -> "EmbeddedFunction":
+        """A function, class or native the program defined as a global, or
+        one from the standard library."""
+        self.interpreter.load_stdlib(name)
+        callee = self.interpreter.lox_globals.values.get(name, None)
+        if not isinstance(callee, LoxCallable):
+            raise KeyError(f"'{name}' is not a Lox function")
+        return EmbeddedFunction(self.interpreter, name, callee)
+
+
+class EmbeddedFunction:
+    """Calls one Lox function from Python.
+
+    Floats, strings, booleans and None are Lox values already and are passed
+    through as they are, only ints become floats. Results are Lox values.
+    Each call gets the whole of the interpreter's budget, if it has one. A
+    runtime error propagates as LoxRuntimeError, with the failing calls
+    left on the interpreter's call_stack.
+    """
+    def __init__(self, interpreter: Interpreter, name: str, callee: LoxCallable):
+        self.interpreter = interpreter
+        self.name = name
+        self.callee = callee
+        self.n_params = callee.arity()
+        # stands in for a call site, embedded calls have none in the source
+        self.call_site: Optional[Token] = getattr(getattr(callee, "declaration", None), "name", None)
+
+    def __call__(self, *arguments: Any) -> Any:
+        return self.call_many((arguments,))[0]
+
+    def call_many(self, rows: Iterable[Sequence[Any]]) -> List[Any]:
+        """Calls the function once per row of arguments."""
+        interpreter, callee, n_params, call_site = self.interpreter, self.callee, self.n_params, self.call_site
+        # frames left by an error in an earlier batch
+        interpreter.call_stack.clear()
+        results: List[Any] = []
+        append = results.append
+        for row in rows:
+            if len(row) != n_params:
+                raise TypeError(f"{self.name} expects {n_params} arguments but got {len(row)}")
+            if int in map(type, row):
+                row = [float(value) if type(value) is int else value for value in row]
+            if interpreter.budget is not None:
+                interpreter.budget.reset()
+            interpreter.call_site = call_site
+            append(callee(interpreter, row))
+        return results
+
+
+def compile(source: str, interpreter: Optional[Interpreter] = None, base_dir: str = ".") -> Program:
+    """Compiles and runs `source`, raising LoxCompileError if it has errors.
+    Imports are found relative to `base_dir`."""
+    module = compile_source(source, "<embedded>", base_dir)
+    if module.errors:
+        raise LoxCompileError(module.errors)
+    if interpreter is None:
+        interpreter = Interpreter()
+    interpreter.run_module(module)
+    return Program(interpreter)
@@ -1,7 +1,7 @@
 from typing import Any, Dict, Optional, Union
 import attr
-from exceptions import LoxRuntimeError
-from tokens import Token
+from .exceptions import LoxRuntimeError
+from .tokens import Token
 
 
 class Environment:
@@ -1,22 +1,41 @@
-from typing import Any
+from typing import Any, List
 import attr
-from tokens import Token
+from .tokens import Token
 
 @attr.s(auto_attribs=True)
 class BreakStmtException(Exception):
     pass
 
 
+@attr.s(auto_attribs=True)
+class LoxCompileError(Exception):
+    # every error reported while scanning, parsing and resolving
+    errors: List[str]
+
+
 @attr.s(auto_attribs=True)
 class LoxRuntimeError(Exception):
     token: Token
     message: str
 
 
+@attr.s(auto_attribs=True)
+class NativeError(Exception):
+    # raised by native functions, which don't know their call site; the
+    # interpreter reports it as a LoxRuntimeError at the call
+    message: str
+
+
 @attr.s(auto_attribs=True)
 class ParseException(Exception):
     pass
 
 @attr.s(auto_attribs=True)
 class ReturnStmtException(Exception):
-    value: Any
\ No newline at end of file
+    value: Any
+
+@attr.s(auto_attribs=True)
+class TailCallException(Exception):
+    callee: Any
+    arguments: List[Any]
+    call_site: Token
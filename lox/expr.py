@@ -1,6 +1,6 @@
 from abc import ABC
 from typing import Any, Generic, List, Optional, TypeVar
-from tokens import Token
+from .tokens import Token
 
 R = TypeVar("R")
 
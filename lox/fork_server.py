@@ -0,0 +1,131 @@
+import contextlib
+import gc
+import io
+import json
+import os
+import socket
+import sys
+from typing import Any, Dict, Optional, Tuple
+
+# seconds between reaps while no jobs arrive
+REAP_INTERVAL = 1.0
+# seconds a client has to send its request
+REQUEST_TIMEOUT = 5.0
+
+
+class ForkServer:
+    """Runs Lox jobs in children forked from a process that already loaded
+    the interpreter and ran the prelude.
+
+    The parent freezes everything it allocated before serving, so children
+    share those pages copy-on-write instead of touching them during
+    collections. A client sends one JSON line {"path": ...} over the unix
+    socket and gets back {"exit": code, "stdout": ..., "stderr": ...}; the
+    child also exits with that code, which the parent logs when it reaps it.
+    """
+    def __init__(self, lox: "Lox", socket_path: str):
+        self.lox = lox
+        self.socket_path = socket_path
+        self.jobs: Dict[int, str] = {}
+
+    def serve_forever(self):
+        gc.collect()
+        gc.freeze()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            server.bind(self.socket_path)
+            server.listen()
+            # wakes up now and then to reap finished jobs while idle
+            server.settimeout(REAP_INTERVAL)
+            print(f"[fork-server] listening on {self.socket_path}", file=sys.stderr)
+            while True:
+                self.reap()
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    continue
+                with conn:
+                    path = self.read_request(conn)
+                    if path is None:
+                        continue
+                    pid = os.fork()
+                    if pid == 0:
+                        # the child must never return into the server loop
+                        try:
+                            server.close()
+                            self.run_job(conn, path)
+                        finally:
+                            os._exit(1)
+                    self.jobs[pid] = path
+        finally:
+            server.close()
+            os.unlink(self.socket_path)
+
+    def read_request(self, conn: socket.socket) -> Optional[str]:
+        """The path a client asked to run, or None after telling it what was
+        wrong with the request."""
+        conn.settimeout(REQUEST_TIMEOUT)
+        try:
+            with conn.makefile("rb") as reader:
+                request = json.loads(reader.readline())
+            path = request["path"]
+            if isinstance(path, str):
+                return path
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        try:
+            response = {"exit": 64, "stdout": "", "stderr": "Bad request, expected {\"path\": ...}.\n"}
+            conn.sendall(json.dumps(response).encode() + b"\n")
+        except OSError:
+            pass
+        return None
+
+    def run_job(self, conn: socket.socket, path: str):
+        # only runs in the child, which must never return into the server loop
+        code = 1
+        try:
+            conn.settimeout(None)
+            stdout, stderr = io.StringIO(), io.StringIO()
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                try:
+                    with open(path, 'r') as f:
+                        source = f.read()
+                    self.lox.base_dir = os.path.dirname(path)
+                    self.lox.run(source)
+                    code = 65 if self.lox.had_error else 70 if self.lox.had_runtime_error else 0
+                except OSError as e:
+                    print(f"Can't read '{path}': {e.strerror}.", file=sys.stderr)
+                    code = 66
+            response = {"exit": code, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+            conn.sendall(json.dumps(response).encode() + b"\n")
+        finally:
+            os._exit(code)
+
+    def reap(self):
+        while self.jobs:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                return
+            path = self.jobs.pop(pid, "?")
+            print(f"[fork-server] {path} exited with {exit_code(status)}", file=sys.stderr)
+
+
+def exit_code(status: int) -> int:
+    # negative for a job killed by a signal, like subprocess reports it
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def submit(socket_path: str, path: str) -> Tuple[int, str, str]:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall(json.dumps({"path": os.path.abspath(path)}).encode() + b"\n")
+        with client.makefile("rb") as reader:
+            line = reader.readline()
+    if not line:
+        return 1, "", "Job ended without a result.\n"
+    response: Dict[str, Any] = json.loads(line)
+    return response["exit"], response["stdout"], response["stderr"]
@@ -0,0 +1,163 @@
+from typing import Any, Callable, Dict, Generator, List, Optional, Tuple, Union
+from .exceptions import LoxRuntimeError
+from .expr import Expr
+from .stmt import Stmt
+from .tokens import Token
+
+Frame = Tuple[str, Optional[Token]]
+Hook = Callable[..., None]
+Node = Union[Expr, Stmt]
+
+EVENTS = ("statement", "enter", "exit", "call", "return", "error")
+# the events fired around nodes, by execute, evaluate and the stackless loop
+NODE_EVENTS = ("statement", "enter", "exit")
+
+
+class Hooks:
+    """Callbacks for debuggers, coverage tools and tracers.
+
+    statement(stmt) runs before each statement, enter(node) before and
+    exit(node) after each statement and expression, even when it fails.
+    call(name, call_site, depth) and return(name, call_site, depth) run when
+    a function or class frame is pushed or popped, a tail call is a return
+    followed by a call at the same depth, and error(error) when a runtime
+    error leaves the program, while its frames are still on call_stack.
+
+    Node events all go through one execute and evaluate, rebuilt from the
+    interpreter's own methods whenever node hooks change, so hooks can be
+    removed in any order. A StacklessInterpreter runs nodes that contain
+    calls in its own loop, which wraps them with `trace_frame`. Nothing is
+    installed until the first hook of an event is added, and removing the
+    last one restores the interpreter as it was.
+    """
+    def __init__(self, interpreter: "Interpreter"):
+        self.interpreter = interpreter
+        self.hooks: Dict[str, List[Hook]] = {event: [] for event in EVENTS}
+        self.originals: Dict[str, Any] = {}
+
+    def add(self, event: str, hook: Hook):
+        if event not in self.hooks:
+            raise ValueError(f"unknown hook event '{event}'")
+        self.hooks[event].append(hook)
+        if len(self.hooks[event]) == 1:
+            self.install(event)
+
+    def remove(self, event: str, hook: Hook):
+        self.hooks[event].remove(hook)
+        if not self.hooks[event]:
+            self.uninstall(event)
+
+    def install(self, event: str):
+        interpreter = self.interpreter
+        if event in NODE_EVENTS:
+            self.dispatch()
+        elif event == "error":
+            self.originals[event] = interpret = interpreter.interpret
+            hooks = self.hooks[event]
+
+            def hooked_interpret(statements: List[Stmt], repl: bool):
+                try:
+                    interpret(statements, repl)
+                except LoxRuntimeError as e:
+                    for hook in hooks:
+                        hook(e)
+                    raise
+            interpreter.interpret = hooked_interpret
+        elif not isinstance(interpreter.call_stack, HookedCallStack):
+            # call and return share the one replacement stack
+            self.originals["call_stack"] = interpreter.call_stack
+            interpreter.call_stack = HookedCallStack(self.hooks["call"], self.hooks["return"], interpreter.call_stack)
+
+    def uninstall(self, event: str):
+        interpreter = self.interpreter
+        if event in NODE_EVENTS:
+            self.dispatch()
+        elif event == "error":
+            interpreter.interpret = self.originals.pop(event)
+        elif not self.hooks["call"] and not self.hooks["return"]:
+            original = self.originals.pop("call_stack")
+            original[:] = interpreter.call_stack
+            interpreter.call_stack = original
+
+    def dispatch(self):
+        """Installs the execute and evaluate that fire the node events, or
+        goes back to the interpreter's own when there are no node hooks."""
+        interpreter = self.interpreter
+        for name in ("execute", "evaluate"):
+            interpreter.__dict__.pop(name, None)
+        interpreter.trace_frame = None
+        statements, enters, exits = (self.hooks[event] for event in NODE_EVENTS)
+        if not (statements or enters or exits):
+            return
+        execute, evaluate = interpreter.execute, interpreter.evaluate
+
+        def enter(node: Node):
+            if isinstance(node, Stmt):
+                for hook in statements:
+                    hook(node)
+            for hook in enters:
+                hook(node)
+
+        def exit(node: Node):
+            for hook in exits:
+                hook(node)
+
+        def hooked_execute(stmt: Stmt):
+            enter(stmt)
+            try:
+                execute(stmt)
+            finally:
+                exit(stmt)
+        interpreter.execute = hooked_execute
+
+        if enters or exits:
+            def hooked_evaluate(expr: Expr) -> Any:
+                enter(expr)
+                try:
+                    return evaluate(expr)
+                finally:
+                    exit(expr)
+            interpreter.evaluate = hooked_evaluate
+
+        def trace_frame(node: Node, frame: Generator[Node, Any, Any]) -> Generator[Node, Any, Any]:
+            if isinstance(node, Expr) and not (enters or exits):
+                return (yield from frame)
+            enter(node)
+            try:
+                return (yield from frame)
+            finally:
+                exit(node)
+        interpreter.trace_frame = trace_frame
+
+
+class HookedCallStack(List[Frame]):
+    """The interpreter's shadow stack, reporting every push and pop. Frames
+    already running when it was installed keep the stack they started with."""
+    def __init__(self, calls: List[Hook], returns: List[Hook], frames: List[Frame]):
+        super().__init__(frames)
+        self.calls = calls
+        self.returns = returns
+
+    def append(self, frame: Frame):
+        super().append(frame)
+        for hook in self.calls:
+            hook(frame[0], frame[1], len(self))
+
+    def pop(self, index: int = -1) -> Frame:
+        depth = len(self)
+        frame = super().pop(index)
+        for hook in self.returns:
+            hook(frame[0], frame[1], depth)
+        return frame
+
+    def __setitem__(self, index: Any, frame: Any):
+        if not isinstance(index, int):
+            super().__setitem__(index, frame)
+            return
+        # a tail call replaces the top frame
+        returned = self[index]
+        super().__setitem__(index, frame)
+        for hook in self.returns:
+            hook(returned[0], returned[1], len(self))
+        for hook in self.calls:
+            hook(frame[0], frame[1], len(self))
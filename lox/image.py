@@ -0,0 +1,37 @@
+import pickle
+from typing import Any, Tuple
+
+# bumped whenever the pickled classes change shape
+IMAGE_VERSION = 3
+
+
+def save_image(interpreter: "Interpreter", filename: str):
+    """Writes the globals, and with them every class, function and AST they
+    reach, plus the resolver's facts about those ASTs."""
+    state: Tuple[Any, ...] = (
+        IMAGE_VERSION,
+        interpreter.lox_globals,
+        interpreter.lox_locals,
+        interpreter.flat_blocks,
+        interpreter.tail_calls,
+        interpreter.import_paths,
+        interpreter.imported,
+    )
+    with open(filename, "wb") as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_image(interpreter: "Interpreter", filename: str):
+    """Replaces the interpreter's globals with those of a saved image."""
+    with open(filename, "rb") as f:
+        state = pickle.load(f)
+    if not isinstance(state, tuple) or state[0] != IMAGE_VERSION:
+        raise ValueError(f"'{filename}' is not an image of this Lox version")
+    _, lox_globals, lox_locals, flat_blocks, tail_calls, import_paths, imported = state
+    interpreter.lox_globals = lox_globals
+    interpreter.environment = lox_globals
+    interpreter.lox_locals.update(lox_locals)
+    interpreter.flat_blocks.update(flat_blocks)
+    interpreter.tail_calls.update(tail_calls)
+    interpreter.import_paths.update(import_paths)
+    interpreter.imported.update(imported)
@@ -0,0 +1,325 @@
+import itertools
+from typing import Dict, List, MutableSet, Optional, Sequence, Tuple
+import attr
+from .ast_rewriter import AstRewriter
+from .expr import Assign, Binary, Call, Expr, ExprVisitor, Get, Grouping, Literal, Logical, Set, Super, This, Unary, Variable
+from .interpreter import Interpreter
+from .modules import Module
+from .stmt import Block, Break, Class, Expression, Function, If, Import, Print, Return, Stmt, StmtVisitor, Var, While
+
+# node kinds an inlined body may contain, evaluating them twice or in a
+# different order can't be observed by a program that doesn't fail
+PURE_EXPRS = (Binary, Get, Grouping, Literal, Logical, This, Unary, Variable)
+
+
+@attr.s(auto_attribs=True, eq=False)
+class Candidate:
+    function: Function
+    # top-level statement index of the function, or of the defining class
+    position: int
+    klass: Optional[Class] = None
+    template: Optional[Expr] = None
+    rejected: bool = False
+
+
+@attr.s(auto_attribs=True)
+class Inliner(AstRewriter):
+    """Replaces calls to small, non-recursive top-level functions and methods
+    with their return expression.
+
+    A callee qualifies when its body is a single `return` of a pure expression
+    and every parameter is used unconditionally, so each argument is still
+    evaluated at least once. Arguments have to be pure as well. Programs that
+    succeed produce the same results, failing ones may report a different one
+    of their errors first.
+    """
+    interpreter: Interpreter
+    max_size: int = 24
+    functions: Dict[str, Candidate] = attr.Factory(dict)
+    # method name -> candidate, only for names defined by exactly one class
+    methods: Dict[str, Candidate] = attr.Factory(dict)
+    classes: Dict[str, Class] = attr.Factory(dict)
+    in_progress: List[Candidate] = attr.Factory(list)
+    current_position: int = 0
+    current_class: Optional[Class] = None
+    inlined: int = 0
+
+    def inline(self, statements: List[Stmt], modules: Sequence[Module] = ()):
+        self.collect_candidates(statements, modules)
+        for position, statement in enumerate(statements):
+            self.current_position = position
+            self.rewrite_stmt(statement)
+
+    def collect_candidates(self, statements: List[Stmt], modules: Sequence[Module]):
+        # imported modules share the globals, whatever they declare or
+        # assign can't be bound statically either
+        declared: Dict[str, int] = {}
+        for statement in itertools.chain(statements, *(module.statements for module in modules)):
+            if isinstance(statement, (Class, Function, Var)):
+                declared[statement.name.lexeme] = declared.get(statement.name.lexeme, 0) + 1
+
+        finder = _Finder(self.interpreter.lox_locals)
+        finder.scan(statements)
+        for module in modules:
+            finder.lox_locals = module.lox_locals
+            finder.scan(module.statements)
+
+        for position, statement in enumerate(statements):
+            if not isinstance(statement, Function):
+                continue
+            name = statement.name.lexeme
+            if declared[name] == 1 and name not in finder.global_assigns:
+                self.functions[name] = Candidate(statement, position)
+
+        class_positions: Dict[Class, int] = {}
+        for position, statement in enumerate(statements):
+            if not isinstance(statement, Class):
+                continue
+            name = statement.name.lexeme
+            if declared[name] == 1 and name not in finder.global_assigns:
+                self.classes[name] = statement
+                class_positions[statement] = position
+
+        # `this.name()` can only be bound statically if no other class could
+        # override the method and no field could shadow it
+        for name, definers in finder.method_definers.items():
+            if len(definers) != 1 or name in finder.property_sets or name == "init":
+                continue
+            klass, method = definers[0]
+            if klass in class_positions:
+                self.methods[name] = Candidate(method, class_positions[klass], klass)
+
+    def expand(self, candidate: Candidate) -> Optional[Expr]:
+        if candidate.template is not None or candidate.rejected:
+            return candidate.template
+        body = candidate.function.body
+        if len(body) != 1 or not isinstance(body[0], Return) or body[0].value is None:
+            candidate.rejected = True
+            return None
+
+        # calls inside the body are bound from the callee's point of view
+        enclosing = self.current_position, self.current_class
+        self.current_position, self.current_class = candidate.position, candidate.klass
+        self.in_progress.append(candidate)
+        try:
+            template = self.rewrite(body[0].value)
+            body[0].value = template
+        finally:
+            self.in_progress.pop()
+            self.current_position, self.current_class = enclosing
+
+        # calls that are still left in the body, e.g. recursive ones, make it impure
+        params = {param.lexeme for param in candidate.function.params}
+        if not is_pure(template) or size(template) > self.max_size \
+                or _unconditional_uses(template, params, self.interpreter.lox_locals) != params:
+            candidate.rejected = True
+            return None
+        candidate.template = template
+        return template
+
+    def inline_call(self, expr: Call, candidate: Candidate, receiver: Optional[Expr]) -> Optional[Expr]:
+        if candidate in self.in_progress:
+            # recursive, directly or through other candidates
+            return None
+        template = self.expand(candidate)
+        if template is None:
+            return None
+        if not all(is_pure(argument) for argument in expr.arguments):
+            return None
+        if receiver is not None and not is_pure(receiver):
+            return None
+
+        substitutions = {param.lexeme: argument for param, argument in zip(candidate.function.params, expr.arguments)}
+        cloner = _Cloner(self.interpreter.lox_locals, substitutions, receiver)
+        inlined = cloner.clone(template)
+        if size(inlined) > self.max_size:
+            return None
+        self.inlined += 1
+        return inlined
+
+    def visit_class_stmt(self, stmt: Class):
+        enclosing_class = self.current_class
+        self.current_class = stmt if self.classes.get(stmt.name.lexeme, None) is stmt else None
+        super().visit_class_stmt(stmt)
+        self.current_class = enclosing_class
+
+    def visit_call_expr(self, expr: Call) -> Expr:
+        super().visit_call_expr(expr)
+
+        callee = expr.callee
+        inlined: Optional[Expr] = None
+        if isinstance(callee, Variable) and callee not in self.interpreter.lox_locals:
+            candidate = self.functions.get(callee.name.lexeme, None)
+            if candidate is not None and self.visible(candidate) \
+                    and len(expr.arguments) == len(candidate.function.params):
+                inlined = self.inline_call(expr, candidate, None)
+        elif isinstance(callee, Get) and isinstance(callee.object, This) and self.current_class is not None:
+            candidate = self.methods.get(callee.name.lexeme, None)
+            if candidate is not None and self.inherits(candidate.function) \
+                    and len(expr.arguments) == len(candidate.function.params):
+                inlined = self.inline_call(expr, candidate, callee.object)
+        return expr if inlined is None else inlined
+
+    def visible(self, candidate: Candidate) -> bool:
+        # a declaration only binds call sites that can't run before it
+        return candidate.position < self.current_position
+
+    def inherits(self, method: Function) -> bool:
+        klass = self.current_class
+        while klass is not None:
+            if any(m is method for m in klass.methods):
+                return True
+            if klass.superclass is None:
+                return False
+            klass = self.classes.get(klass.superclass.name.lexeme, None)
+        return False
+
+
+def children(expr: Expr) -> List[Expr]:
+    if isinstance(expr, (Binary, Logical)):
+        return [expr.left, expr.right]
+    if isinstance(expr, Unary):
+        return [expr.right]
+    if isinstance(expr, Grouping):
+        return [expr.expression]
+    if isinstance(expr, Get):
+        return [expr.object]
+    if isinstance(expr, Assign):
+        return [expr.value]
+    if isinstance(expr, Set):
+        return [expr.object, expr.value]
+    if isinstance(expr, Call):
+        return [expr.callee] + expr.arguments
+    return []
+
+
+def is_pure(expr: Expr) -> bool:
+    return isinstance(expr, PURE_EXPRS) and all(is_pure(child) for child in children(expr))
+
+
+def size(expr: Expr) -> int:
+    return 1 + sum(size(child) for child in children(expr))
+
+
+def _unconditional_uses(expr: Expr, params: MutableSet[str], lox_locals: Dict[Expr, int]) -> MutableSet[str]:
+    if isinstance(expr, Variable):
+        if expr in lox_locals and expr.name.lexeme in params:
+            return {expr.name.lexeme}
+        return set()
+    if isinstance(expr, Logical):
+        # the right operand may be skipped
+        return _unconditional_uses(expr.left, params, lox_locals)
+    used = set()
+    for child in children(expr):
+        used |= _unconditional_uses(child, params, lox_locals)
+    return used
+
+
+@attr.s(auto_attribs=True)
+class _Finder(StmtVisitor[None]):
+    lox_locals: Dict[Expr, int]
+    global_assigns: MutableSet[str] = attr.Factory(set)
+    property_sets: MutableSet[str] = attr.Factory(set)
+    method_definers: Dict[str, List[Tuple[Class, Function]]] = attr.Factory(dict)
+
+    def scan(self, statements: List[Stmt]):
+        for statement in statements:
+            statement.accept(self)
+
+    def scan_expr(self, expr: Optional[Expr]):
+        if expr is None:
+            return
+        if isinstance(expr, Assign) and expr not in self.lox_locals:
+            self.global_assigns.add(expr.name.lexeme)
+        elif isinstance(expr, Set):
+            self.property_sets.add(expr.name.lexeme)
+        for child in children(expr):
+            self.scan_expr(child)
+
+    def visit_block_stmt(self, stmt: Block):
+        self.scan(stmt.statements)
+
+    def visit_break_stmt(self, stmt: Break):
+        return
+
+    def visit_class_stmt(self, stmt: Class):
+        for method in stmt.methods:
+            self.method_definers.setdefault(method.name.lexeme, []).append((stmt, method))
+            self.scan(method.body)
+
+    def visit_expression_stmt(self, stmt: Expression):
+        self.scan_expr(stmt.expression)
+
+    def visit_function_stmt(self, stmt: Function):
+        self.scan(stmt.body)
+
+    def visit_if_stmt(self, stmt: If):
+        self.scan_expr(stmt.condition)
+        stmt.then_branch.accept(self)
+        if stmt.else_branch is not None:
+            stmt.else_branch.accept(self)
+
+    def visit_import_stmt(self, stmt: Import):
+        return
+
+    def visit_print_stmt(self, stmt: Print):
+        self.scan_expr(stmt.expression)
+
+    def visit_return_stmt(self, stmt: Return):
+        self.scan_expr(stmt.value)
+
+    def visit_var_stmt(self, stmt: Var):
+        self.scan_expr(stmt.initializer)
+
+    def visit_while_stmt(self, stmt: While):
+        self.scan_expr(stmt.condition)
+        stmt.body.accept(self)
+
+
+@attr.s(auto_attribs=True)
+class _Cloner(ExprVisitor[Expr]):
+    lox_locals: Dict[Expr, int]
+    substitutions: Dict[str, Expr]
+    receiver: Optional[Expr]
+
+    def clone(self, expr: Expr) -> Expr:
+        return expr.accept(self)
+
+    def copy_resolution(self, original: Expr, copy: Expr) -> Expr:
+        distance = self.lox_locals.get(original, None)
+        if distance is not None:
+            self.lox_locals[copy] = distance
+        return copy
+
+    def substitute(self, argument: Expr) -> Expr:
+        # arguments were resolved at the call site, which is where the
+        # inlined expression runs, so they only need fresh nodes
+        return _Cloner(self.lox_locals, {}, None).clone(argument)
+
+    def visit_binary_expr(self, expr: Binary) -> Expr:
+        return Binary(self.clone(expr.left), expr.operator, self.clone(expr.right))
+
+    def visit_get_expr(self, expr: Get) -> Expr:
+        return Get(self.clone(expr.object), expr.name)
+
+    def visit_grouping_expr(self, expr: Grouping) -> Expr:
+        return Grouping(self.clone(expr.expression))
+
+    def visit_literal_expr(self, expr: Literal) -> Expr:
+        return Literal(expr.value)
+
+    def visit_logical_expr(self, expr: Logical) -> Expr:
+        return Logical(self.clone(expr.left), expr.operator, self.clone(expr.right))
+
+    def visit_this_expr(self, expr: This) -> Expr:
+        if self.receiver is not None:
+            return self.substitute(self.receiver)
+        return self.copy_resolution(expr, This(expr.keyword))
+
+    def visit_unary_expr(self, expr: Unary) -> Expr:
+        return Unary(expr.operator, self.clone(expr.right))
+
+    def visit_variable_expr(self, expr: Variable) -> Expr:
+        if expr in self.lox_locals and expr.name.lexeme in self.substitutions:
+            return self.substitute(self.substitutions[expr.name.lexeme])
+        return self.copy_resolution(expr, Variable(expr.name))
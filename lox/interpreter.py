@@ -1,30 +1,72 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, MutableSet, Optional, Tuple
+from weakref import WeakSet
 import attr
-from clock import Clock
-from environment import Environment
-from exceptions import BreakStmtException, LoxRuntimeError, ReturnStmtException
-from expr import Assign, Binary, Call, Expr, Get, Grouping, Literal, Logical, Set, Super, This, Unary, ExprVisitor, Variable
-from lox_callable import LoxCallable
-from lox_class import LoxClass, LoxInstance
-from lox_function import LoxFunction
-from stmt import Block, Break, Class, Expression, Function, If, Print, Return, Stmt, StmtVisitor, Var, While
-from token_type import TokenType
-from tokens import Token
+from .ast_rewriter import AstRewriter
+from . import clock  # defines the clock() native
+from .environment import Environment
+from .exceptions import BreakStmtException, LoxRuntimeError, NativeError, ReturnStmtException, TailCallException
+from .expr import Assign, Binary, Call, Expr, Get, Grouping, Literal, Logical, Set, Super, This, Unary, ExprVisitor, Variable
+from .hooks import Hook, Hooks
+from .lox_callable import LoxCallable
+from .lox_class import LoxClass, LoxInstance
+from .lox_collections import LoxList, LoxMap
+from .lox_float_array import FloatArray
+from .lox_function import LoxFunction
+from .lox_native import NATIVES, NativeFunction, NativeInstance
+from .stmt import Block, Break, Class, Expression, Function, If, Import, Print, Return, Stmt, StmtVisitor, Var, While
+from .timing import Benchmark
+from .token_type import TokenType
+from .tokens import Token
+from .typed_expr import TypedBinary, TypedDivide, TypedUnary
 
 class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
     def __init__(self):
         self.lox_globals = Environment()
-        self.lox_globals.define("clock", Clock())
+        for name, native in NATIVES.items():
+            self.lox_globals.define(name, native)
+        self.lox_globals.define("benchmark", Benchmark())
         self.environment = self.lox_globals
         self.lox_locals: Dict[Expr, int] = {}
+        self.flat_blocks: MutableSet[Block] = set()
+        self.tail_calls: MutableSet[Call] = set()
+        # shadow stack of (Lox function name, call site) for profilers, kept
+        # by LoxFunction and LoxClass
+        self.call_stack: List[Tuple[str, Token]] = []
+        self.call_site: Optional[Token] = None
+        # Super node -> (superclass it was last evaluated with, its method)
+        self.super_methods: Dict[Super, Tuple[LoxClass, LoxFunction]] = {}
+        self.import_paths: Dict[Import, str] = {}
+        # every function and method as declared, to tell which declarations
+        # are still alive when forgetting statements
+        self.functions: "WeakSet[LoxFunction]" = WeakSet()
+        self.imported: MutableSet[str] = set()
+        self.hooks: Optional[Hooks] = None
+        # set by Hooks while node hooks are installed, wraps the frames a
+        # StacklessInterpreter runs outside execute and evaluate
+        self.trace_frame: Optional[Callable[..., Any]] = None
+        # limits for each run, set by Budget.install
+        self.budget: Optional["Budget"] = None
 
     def interpret(self, statements: List[Stmt], repl: bool):
         # chapter 8 challenge 1 allow REPL to print last expression
-        if repl and isinstance(statements[-1], Expression):
-            statements[-1] = Print(statements[-1].expression)
+        # without changing `statements`, Lox may have cached them
+        if repl and statements and isinstance(statements[-1], Expression):
+            statements = statements[:-1] + [Print(statements[-1].expression)]
+        # frames are left behind when a runtime error unwinds the last run
+        self.call_stack.clear()
         for statement in statements:
             self.execute(statement)
 
+    def add_hook(self, event: str, hook: Hook):
+        """Registers a "statement", "enter", "exit", "call", "return" or
+        "error" hook, see Hooks."""
+        if self.hooks is None:
+            self.hooks = Hooks(self)
+        self.hooks.add(event, hook)
+
+    def remove_hook(self, event: str, hook: Hook):
+        self.hooks.remove(event, hook)
+
     def evaluate(self, expr: Expr) -> Any:
         return expr.accept(self)
 
@@ -34,6 +76,32 @@ class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
     def resolve(self, expr: Expr, depth: int):
         self.lox_locals[expr] = depth
 
+    def flatten(self, block: Block):
+        self.flat_blocks.add(block)
+
+    def tail_call(self, expr: Call):
+        self.tail_calls.add(expr)
+
+    def resolve_import(self, stmt: Import, path: str):
+        self.import_paths[stmt] = path
+
+    def forget(self, statements: List[Stmt]):
+        """Drops what the resolver and the interpreter recorded about
+        statements that will never run again, except in the bodies of
+        functions they declared that are still alive."""
+        live = {function.declaration for function in self.functions}
+        collector = NodeCollector(live)
+        collector.rewrite_statements(statements)
+        self.forget_nodes(collector.nodes)
+
+    def forget_nodes(self, nodes: List[Any]):
+        for node in nodes:
+            self.lox_locals.pop(node, None)
+            self.super_methods.pop(node, None)
+            self.import_paths.pop(node, None)
+            self.flat_blocks.discard(node)
+            self.tail_calls.discard(node)
+
     def execute_block(self, statements: List[Stmt], environment: Environment):
         previous = self.environment
         try:
@@ -44,7 +112,12 @@ class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
             self.environment = previous
 
     def visit_block_stmt(self, stmt: Block):
-        self.execute_block(stmt.statements, Environment(self.environment))
+        if stmt in self.flat_blocks:
+            # escape analysis found nothing captured, run in the host's storage
+            for statement in stmt.statements:
+                self.execute(statement)
+        else:
+            self.execute_block(stmt.statements, Environment(self.environment))
 
     def visit_class_stmt(self, stmt: Class):
         superclass: Optional[Any] = None
@@ -63,6 +136,7 @@ class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
         for method in stmt.methods:
             fn = LoxFunction(method, self.environment, method.name.lexeme == "init")
             methods[method.name.lexeme] = fn
+            self.functions.add(fn)
 
         klass = LoxClass(stmt.name.lexeme, superclass, methods)
 
@@ -80,6 +154,7 @@ class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
     def visit_function_stmt(self, stmt: Function):
         fn = LoxFunction(stmt, self.environment, False)
         self.environment.define(stmt.name.lexeme, fn)
+        self.functions.add(fn)
 
     def visit_if_stmt(self, stmt: If):
         if self.is_truthy(self.evaluate(stmt.condition)):
@@ -87,6 +162,28 @@ class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
         elif stmt.else_branch != None:
             self.execute(stmt.else_branch)
 
+    def visit_import_stmt(self, stmt: Import):
+        path = self.import_paths[stmt]
+        if path in self.imported:
+            return
+        # compiled on first use unless Lox compiled the imports up front
+        from .modules import load_module
+        module = load_module(path)
+        if module.errors:
+            raise LoxRuntimeError(stmt.path, f"Can't import {stmt.path.lexeme}.\n" + "\n".join(module.errors))
+        # marked before running so that import cycles terminate
+        self.imported.add(path)
+        self.run_module(module)
+
+    def run_module(self, module: "Module"):
+        self.lox_locals.update(module.lox_locals)
+        self.flat_blocks.update(module.flat_blocks)
+        self.tail_calls.update(module.tail_calls)
+        self.import_paths.update(module.import_paths)
+        # imports are top-level only, modules define their names as globals
+        for statement in module.statements:
+            self.execute(statement)
+
     def visit_print_stmt(self, stmt: Print):
         value = self.evaluate(stmt.expression)
         print(self.stringify(value))
@@ -94,7 +191,18 @@ class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
     def visit_return_stmt(self, stmt: Return):
         value = None
         if stmt.value is not None:
-            value = self.evaluate(stmt.value)
+            if stmt.value in self.tail_calls:
+                # the calling LoxFunction makes calls to other Lox functions
+                # in its own frame
+                callee = self.evaluate(stmt.value.callee)
+                arguments = [self.evaluate(argument) for argument in stmt.value.arguments]
+                self.check_call(stmt.value, callee, arguments)
+                if isinstance(callee, LoxFunction):
+                    raise TailCallException(callee, arguments, stmt.value.paren)
+                self.call_site = stmt.value.paren
+                value = callee(self, arguments)
+            else:
+                value = self.evaluate(stmt.value)
         raise ReturnStmtException(value)
 
     def visit_var_stmt(self, stmt: Var):
@@ -113,73 +221,116 @@ class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
             pass
 
     def visit_assign_expr(self, expr: Assign) -> Any:
-        value = self.evaluate(expr.value)
+        return self.assign_variable(expr, self.evaluate(expr.value))
 
+    def assign_variable(self, expr: Assign, value: Any) -> Any:
         distance = self.lox_locals.get(expr, None)
         if distance is not None:
             self.environment.assign_at(distance, expr.name, value)
         else:
-            self.lox_globals.assign(expr.name, value)
-            
+            try:
+                self.lox_globals.assign(expr.name, value)
+            except LoxRuntimeError:
+                # a standard library name that wasn't read yet
+                if not self.load_stdlib(expr.name.lexeme):
+                    raise
+                self.lox_globals.assign(expr.name, value)
         return value
 
     def visit_binary_expr(self, expr: Binary) -> Any:
-        left = self.evaluate(expr.left)
-        right = self.evaluate(expr.right)
-        if expr.operator.token_type == TokenType.BANG_EQUAL:
+        return self.binary(expr.operator, self.evaluate(expr.left), self.evaluate(expr.right))
+
+    def binary(self, operator: Token, left: Any, right: Any) -> Any:
+        if operator.token_type == TokenType.BANG_EQUAL:
             return not self.is_equal(left, right)
-        if expr.operator.token_type == TokenType.EQUAL_EQUAL:
+        if operator.token_type == TokenType.EQUAL_EQUAL:
             return self.is_equal(left, right)
-        if expr.operator.token_type == TokenType.GREATER:
-            self.check_number_operands(expr.operator, left, right)
-            return float(left) > float(right)
-        if expr.operator.token_type == TokenType.GREATER_EQUAL:
-            self.check_number_operands(expr.operator, left, right)
-            return float(left) >= float(right)
-        if expr.operator.token_type == TokenType.LESS:
-            self.check_number_operands(expr.operator, left, right)
-            return float(left) < float(right)
-        if expr.operator.token_type == TokenType.LESS_EQUAL:
-            self.check_number_operands(expr.operator, left, right)
-            return float(left) <= float(right)
-        if expr.operator.token_type == TokenType.MINUS:
-            self.check_number_operands(expr.operator, left, right)
-            return float(left) - float(right)
-        if expr.operator.token_type == TokenType.PLUS:
+        if operator.token_type == TokenType.GREATER:
+            self.check_number_operands(operator, left, right)
+            return left > right
+        if operator.token_type == TokenType.GREATER_EQUAL:
+            self.check_number_operands(operator, left, right)
+            return left >= right
+        if operator.token_type == TokenType.LESS:
+            self.check_number_operands(operator, left, right)
+            return left < right
+        if operator.token_type == TokenType.LESS_EQUAL:
+            self.check_number_operands(operator, left, right)
+            return left <= right
+        if operator.token_type == TokenType.MINUS:
+            self.check_number_operands(operator, left, right)
+            return left - right
+        if operator.token_type == TokenType.PLUS:
             if isinstance(left, float) and isinstance(right, float):
-                return float(left) + float(right)
+                return left + right
             if isinstance(left, str) or isinstance(right, str):
                 # chapter 7 challenge 2 allow implicit conversion if one is a str
                 return str(left) + str(right)
-            raise LoxRuntimeError(expr.operator, "Operands must be two numbers or two strings.")
-        if expr.operator.token_type == TokenType.SLASH:
-            self.check_number_operands(expr.operator, left, right)
+            raise LoxRuntimeError(operator, "Operands must be two numbers or two strings.")
+        if operator.token_type == TokenType.SLASH:
+            self.check_number_operands(operator, left, right)
             # chapter 7 challenge 3 detect and report div by 0 errors
             if right == 0:
-                raise LoxRuntimeError(expr.operator, "Cannot divide by zero.")
-            return float(left) / float(right)
-        if expr.operator.token_type == TokenType.STAR:
-            self.check_number_operands(expr.operator, left, right)
-            return float(left) * float(right)
+                raise LoxRuntimeError(operator, "Cannot divide by zero.")
+            return left / right
+        if operator.token_type == TokenType.STAR:
+            self.check_number_operands(operator, left, right)
+            return left * right
     
+    def visit_typed_binary_expr(self, expr: TypedBinary) -> Any:
+        return expr.op(self.evaluate(expr.left), self.evaluate(expr.right))
+
+    def visit_typed_divide_expr(self, expr: TypedDivide) -> Any:
+        left = self.evaluate(expr.left)
+        right = self.evaluate(expr.right)
+        if right == 0:
+            raise LoxRuntimeError(expr.operator, "Cannot divide by zero.")
+        return left / right
+
     def visit_call_expr(self, expr: Call) -> Any:
+        if type(expr.callee) is Super:
+            return self.call_super(expr, expr.callee)
         callee = self.evaluate(expr.callee)
         arguments: List[Any] = []
         for argument in expr.arguments:
             arguments.append(self.evaluate(argument))
+        if type(callee) is NativeFunction and len(arguments) == callee.n_params:
+            try:
+                return callee.fn(*arguments)
+            except NativeError as e:
+                raise LoxRuntimeError(expr.paren, e.message)
+        self.check_call(expr, callee, arguments)
+        self.call_site = expr.paren
+        return callee(self, arguments)
+
+    def call_super(self, expr: Call, callee: Super) -> Any:
+        # `super.method(...)` runs the method on `this` without creating the
+        # bound LoxFunction
+        distance = self.lox_locals[callee]
+        method = self.super_method(callee, distance)
+        obj: LoxInstance = self.environment.get_at(distance - 1, "this")
+        arguments: List[Any] = []
+        for argument in expr.arguments:
+            arguments.append(self.evaluate(argument))
+        self.check_call(expr, method, arguments)
+        self.call_site = expr.paren
+        environment = Environment(method.closure)
+        environment.define("this", obj)
+        return method(self, arguments, environment)
+
+    def check_call(self, expr: Call, callee: Any, arguments: List[Any]):
         if not isinstance(callee, LoxCallable):
             raise LoxRuntimeError(expr.paren, "Can only call functions and classes.")
         if len(arguments) != callee.arity():
             raise LoxRuntimeError(expr.paren, f"Expected {callee.arity()} arguments but got {len(arguments)}.")
-        return callee(self, arguments)
 
     def visit_get_expr(self, expr: Get) -> Any:
         obj: Any = self.evaluate(expr.object)
-        if isinstance(obj, LoxInstance):
+        if isinstance(obj, (LoxInstance, NativeInstance)):
             return obj.get(expr.name)
         raise LoxRuntimeError(expr.name, "Only instances have properties.")
 
-    def visit_grouping(self, expr: Grouping) -> Any:
+    def visit_grouping_expr(self, expr: Grouping) -> Any:
         return self.evaluate(expr.expression)
 
     def visit_literal_expr(self, expr: Literal) -> Any:
@@ -205,25 +356,37 @@ class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
 
     def visit_super_expr(self, expr: Super) -> Any:
         distance = self.lox_locals[expr]
-        superclass: LoxClass = self.environment.get_at(distance, "super")
-
+        method = self.super_method(expr, distance)
         obj: LoxInstance = self.environment.get_at(distance - 1, "this")
+        return method.bind(obj)
 
+    def super_method(self, expr: Super, distance: int) -> LoxFunction:
+        superclass: LoxClass = self.environment.get_at(distance, "super")
+        # a class declaration that runs again can bind a different superclass
+        cached = self.super_methods.get(expr, None)
+        if cached is not None and cached[0] is superclass:
+            return cached[1]
         method: Optional[LoxFunction] = superclass.find_method(expr.method.lexeme)
         if method is None:
             raise LoxRuntimeError(expr.method, f"Undefined property '{expr.method.lexeme}'.")
-        return method.bind(obj)
+        self.super_methods[expr] = (superclass, method)
+        return method
 
     def visit_this_expr(self, expr: This) -> Any:
         return self.lookup_variable(expr.keyword, expr)
 
     def visit_unary_expr(self, expr: Unary) -> Any:
-        right = self.evaluate(expr.right)
-        if expr.operator.token_type == TokenType.BANG:
+        return self.unary(expr.operator, self.evaluate(expr.right))
+
+    def unary(self, operator: Token, right: Any) -> Any:
+        if operator.token_type == TokenType.BANG:
             return not self.is_truthy(right)
-        elif expr.operator.token_type == TokenType.MINUS:
-            self.check_number_operand(expr.operator, right)
-            return -float(right)
+        elif operator.token_type == TokenType.MINUS:
+            self.check_number_operand(operator, right)
+            return -right
+
+    def visit_typed_unary_expr(self, expr: TypedUnary) -> Any:
+        return expr.op(self.evaluate(expr.right))
 
     def visit_variable_expr(self, expr: Variable) -> Any:
         return self.lookup_variable(expr.name, expr)
@@ -232,7 +395,24 @@ class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
         distance = self.lox_locals.get(expr, None)
         if distance is not None:
             return self.environment.get_at(distance, name)
-        return self.lox_globals.get(name)
+        try:
+            return self.lox_globals.get(name)
+        except LoxRuntimeError:
+            if not self.load_stdlib(name.lexeme):
+                raise
+            return self.lox_globals.get(name)
+
+    def load_stdlib(self, name: str) -> bool:
+        if name in self.lox_globals.values:
+            return False
+        # imported on the first global miss, programs that never use the
+        # standard library don't load it
+        from . import stdlib
+        native = stdlib.STDLIB.get(name, None)
+        if native is None:
+            return False
+        self.lox_globals.define(name, native)
+        return True
 
     def check_number_operand(self, operator: Token, operand: Any):
         if isinstance(operand, float):
@@ -262,4 +442,30 @@ class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
             if s.endswith(".0"):
                 return s[:-2]
             return s
+        if isinstance(obj, LoxList):
+            return "[" + ", ".join(self.stringify(item) for item in obj.items) + "]"
+        if isinstance(obj, FloatArray):
+            return "FloatArray[" + ", ".join(self.stringify(float(item)) for item in obj.data) + "]"
+        if isinstance(obj, LoxMap):
+            return "{" + ", ".join(f"{self.stringify(k)}: {self.stringify(v)}" for k, v in obj.entries.items()) + "}"
         return str(obj)
+
+
+class NodeCollector(AstRewriter):
+    """Lists every statement and expression, leaving out the bodies of the
+    `kept` functions."""
+    def __init__(self, kept: MutableSet[Function]):
+        self.kept = kept
+        self.nodes: List[Any] = []
+
+    def rewrite(self, expr: Expr) -> Expr:
+        self.nodes.append(expr)
+        return expr.accept(self)
+
+    def rewrite_stmt(self, stmt: Stmt):
+        self.nodes.append(stmt)
+        stmt.accept(self)
+
+    def visit_function_stmt(self, stmt: Function):
+        if stmt not in self.kept:
+            super().visit_function_stmt(stmt)
@@ -1,26 +1,76 @@
 import argparse
+import importlib
+import mmap
+import os
+import pickle
 import sys
-from typing import List
+from collections import OrderedDict
+from typing import List, Optional, Tuple
 
-from ast_printer import AstPrinter
-from exceptions import LoxRuntimeError
-from expr import Expr
-from interpreter import Interpreter
-from lox_parser import Parser
-from resolver import Resolver
-from scanner import Scanner
-from tokens import Token
+if not __package__:
+    # run as `python lox/lox.py`, the other modules are imported from the
+    # package this file is part of
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    importlib.import_module("lox")
+    __package__ = "lox"
+
+from .ast_printer import AstPrinter
+from .budget import Budget
+from .byte_scanner import ByteScanner
+from .exceptions import LoxRuntimeError
+from .expr import Expr
+from .fork_server import ForkServer, submit
+from .image import load_image, save_image
+from .inliner import Inliner
+from .interpreter import Interpreter
+from .lox_parser import Parser
+from .lox_traceback import format_traceback
+from .modules import load_modules
+from .profiler import Profiler
+from .resolver import Resolver
+from .scanner import Scanner
+from .source_map import SourceMap, format_error
+from .stmt import Stmt
+from .stackless_interpreter import StacklessInterpreter
+from .trace_counts import TraceCounter
+from .tokens import Token
+from .type_inference import specialize_types
+
+# resolved statements kept for snippets that Lox.run sees again
+SNIPPET_CACHE_SIZE = 256
+
+SnippetKey = Tuple[str, bool, str, bool, bool, bool, bool]
 
 class Lox():
-    def __init__(self):
+    def __init__(self, interpreter: Optional[Interpreter] = None):
         self.had_error = False
         self.had_runtime_error = False
-        self.interpreter = Interpreter()
+        self.interpreter = interpreter if interpreter is not None else Interpreter()
         self.print_ast = False
+        self.inline = True
+        # set when this is the only program the interpreter will run, the
+        # inliner needs to know nothing else can rebind the globals
+        self.whole_program = False
+        self.infer_types = True
+        self.type_stats = False
+        self.base_dir = "."
+        self.compile_workers = 1
+        self.mmap = False
+        # one front end for every run
+        self.scanner = Scanner("", self.report)
+        self.parser = Parser([], self.report)
+        self.resolver = Resolver(self.interpreter, self.report)
+        self.ast_printer = AstPrinter()
+        self.snippets: "OrderedDict[SnippetKey, List[Stmt]]" = OrderedDict()
 
     def run_file(self, filename: str):
-        with open(filename, 'r') as f:
-            self.run(f.read())
+        self.base_dir = os.path.dirname(os.path.abspath(filename))
+        if self.mmap:
+            self.run_mapped(filename)
+        else:
+            with open(filename, 'r') as f:
+                self.scanner.reset(f.read())
+            self.run_tokens(self.scanner.scan_tokens())
         if self.had_error:
             sys.exit(65)
         if self.had_runtime_error:
@@ -34,49 +84,180 @@ class Lox():
             self.had_error = False
             line = input(">")
 
+    def run_mapped(self, filename: str):
+        # tokens keep the mapping alive for as long as the AST needs their text
+        with open(filename, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                source = b""
+            else:
+                source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.run_tokens(ByteScanner(source, self.report).scan_tokens())
+
+    def run_tokens(self, tokens: List[Token]):
+        statements = self.compile(tokens, False)
+        if statements is not None:
+            self.execute(statements, False)
+
     def run(self, source: str, repl: bool = False):
-        scanner = Scanner(source, self.error)
-        tokens: List[Token] = scanner.scan_tokens()
-        parser = Parser(tokens, self.report)
-        statements = parser.parse()
+        """Runs a snippet, reusing its statements if it ran recently."""
+        # identical source compiles to the same statements, as long as
+        # nothing that decides how it compiles has changed
+        key = (source, repl, self.base_dir, self.inline, self.whole_program, self.infer_types, self.print_ast)
+        statements = self.snippets.get(key, None)
+        if statements is None:
+            self.scanner.reset(source)
+            statements = self.compile(self.scanner.scan_tokens(), repl)
+            if statements is None:
+                return
+            self.snippets[key] = statements
+            if len(self.snippets) > SNIPPET_CACHE_SIZE:
+                _, evicted = self.snippets.popitem(last=False)
+                self.interpreter.forget(evicted)
+        else:
+            self.snippets.move_to_end(key)
+        self.execute(statements, repl)
+
+    def compile(self, tokens: List[Token], repl: bool) -> Optional[List[Stmt]]:
+        """Parses and resolves the tokens, then optimizes the statements,
+        or returns None after reporting errors."""
+        self.parser.reset(tokens)
+        statements = self.parser.parse()
 
         if self.had_error:
-            return
+            return None
 
         if self.print_ast:
-            ast_printer = AstPrinter()
-            ast_printer.print_statements(statements)
+            self.ast_printer.print_statements(statements)
 
-        resolver = Resolver(self.interpreter, self.report)
-        resolver.resolve(statements)
+        self.resolver.reset(self.base_dir)
+        self.resolver.resolve(statements)
 
         if self.had_error:
-            return
-        
+            return None
+
+        # compile everything the program imports before it runs, so that
+        # the inliner can see what the modules declare; modules that already
+        # ran, in an earlier REPL line or a loaded image, aren't needed
+        pending = [path for path in self.interpreter.import_paths.values() if path not in self.interpreter.imported]
+        modules = load_modules(pending, self.compile_workers)
+
+        # a later program, REPL line or image function could redefine
+        # anything that got inlined
+        if self.inline and self.whole_program and not repl:
+            Inliner(self.interpreter).inline(statements, modules)
+
+        if self.infer_types:
+            stats = specialize_types(statements, self.interpreter.lox_locals, self.interpreter.flat_blocks)
+            if self.type_stats:
+                print(f"[types] {stats}", file=sys.stderr)
+        return statements
+
+    def execute(self, statements: List[Stmt], repl: bool):
+        # every file, snippet and REPL line gets the whole budget
+        if self.interpreter.budget is not None:
+            self.interpreter.budget.reset()
         try:
             self.interpreter.interpret(statements, repl)
         except LoxRuntimeError as e:
             self.runtime_error(e)
 
-    def error(self, line: int, msg: str):
-        self.report(line, "", msg)
-
     def runtime_error(self, error: LoxRuntimeError):
-        print(f"{error.message}\n[line {error.token.line}]", file=sys.stderr)
+        print(error.message, file=sys.stderr)
+        # errors in calls that Python made have no token
+        if error.token is not None:
+            source_map, offset = error.token.source_map, error.token.offset
+            print(f"[{source_map.describe(offset)}]", file=sys.stderr)
+            excerpt = source_map.excerpt(offset)
+            if excerpt:
+                print(excerpt, file=sys.stderr)
+        # the frames the error unwound are still on the shadow stack
+        if self.interpreter.call_stack:
+            for line in format_traceback(error.token, self.interpreter.call_stack):
+                print(line, file=sys.stderr)
         self.had_runtime_error = True
 
-    def report(self, line: int, where: str, msg: str):
-        print(f"[line {line}] Error{where}: {msg}", file=sys.stderr)
+    def report(self, source_map: SourceMap, offset: int, where: str, msg: str):
+        print(format_error(source_map, offset, where, msg), file=sys.stderr)
         self.had_error = True
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="Python implementation of Lox")
     parser.add_argument("--filename", help="Lox file to run")
+    parser.add_argument("--no-inline", action="store_true", help="don't inline calls to small functions")
+    parser.add_argument("--no-type-inference", action="store_true", help="keep every runtime type check")
+    parser.add_argument("--type-stats", action="store_true", help="report how many type checks were eliminated")
+    parser.add_argument("--profile", metavar="OUT", help="sample Lox call stacks and write them to OUT in collapsed-stack format")
+    parser.add_argument("--profile-interval", type=float, default=0.005, help="seconds of CPU time between profile samples")
+    parser.add_argument("--trace-counts", metavar="OUT", nargs="?", const="-",
+                        help="count node executions and time per line, print a hot-lines report or write JSON to OUT")
+    parser.add_argument("--compile-workers", type=int, default=1,
+                        help="compile imported modules in this many processes")
+    parser.add_argument("--image", metavar="IN", help="start from the globals saved in an image")
+    parser.add_argument("--save-image", metavar="OUT", help="save the globals to an image after running the file")
+    parser.add_argument("--fork-server", metavar="SOCKET",
+                        help="run --filename as a prelude, then fork a child per job sent to SOCKET")
+    parser.add_argument("--submit", metavar="SOCKET", help="run --filename in the fork server at SOCKET")
+    parser.add_argument("--stackless", action="store_true",
+                        help="keep Lox calls off the Python stack so deep recursion doesn't overflow it")
+    parser.add_argument("--max-stack", type=int, default=100000, help="Lox call depth limit in --stackless mode")
+    parser.add_argument("--mmap", action="store_true",
+                        help="scan --filename from a memory mapping instead of reading it into memory")
+    parser.add_argument("--max-steps", type=int, help="stop after this many loop iterations and calls")
+    parser.add_argument("--timeout", type=float, help="stop after this many seconds")
+    parser.add_argument("--max-depth", type=int, help="stop when calls nest deeper than this")
     args = parser.parse_args()
 
-    lox = Lox()
-    if args.filename:
-        lox.run_file(args.filename)
-    else:
-        lox.run_prompt()
\ No newline at end of file
+    if args.submit:
+        code, out, err = submit(args.submit, args.filename)
+        sys.stdout.write(out)
+        sys.stderr.write(err)
+        sys.exit(code)
+
+    lox = Lox(StacklessInterpreter(args.max_stack) if args.stackless else None)
+    lox.inline = not args.no_inline
+    # images and fork-server jobs share the globals with other programs
+    lox.whole_program = bool(args.filename) and not (args.image or args.save_image or args.fork_server)
+    lox.infer_types = not args.no_type_inference
+    lox.type_stats = args.type_stats
+    lox.compile_workers = args.compile_workers
+    lox.mmap = args.mmap
+
+    profiler = None
+    if args.profile:
+        profiler = Profiler(lox.interpreter, args.profile_interval)
+        profiler.start()
+    counter = None
+    if args.trace_counts is not None:
+        counter = TraceCounter()
+        counter.install(lox.interpreter)
+    try:
+        if args.image:
+            try:
+                load_image(lox.interpreter, args.image)
+            except (OSError, ValueError, ImportError, pickle.UnpicklingError) as e:
+                print(f"Can't load image: {e}", file=sys.stderr)
+                sys.exit(66)
+        if args.max_steps is not None or args.timeout is not None or args.max_depth is not None:
+            Budget(args.max_steps, args.timeout, args.max_depth).install(lox.interpreter)
+        if args.filename:
+            lox.run_file(args.filename)
+        if args.fork_server:
+            ForkServer(lox, args.fork_server).serve_forever()
+        elif not args.filename:
+            lox.run_prompt()
+        if args.save_image:
+            save_image(lox.interpreter, args.save_image)
+    finally:
+        if profiler is not None:
+            profiler.stop()
+            profiler.write(args.profile)
+        if counter is not None:
+            if args.trace_counts == "-":
+                source_lines = None
+                if args.filename:
+                    with open(args.filename, 'r') as f:
+                        source_lines = f.read().splitlines()
+                counter.report(sys.stderr, source_lines)
+            else:
+                counter.write_json(args.trace_counts)
\ No newline at end of file
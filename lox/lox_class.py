@@ -1,8 +1,9 @@
 from typing import Any, Dict, List, Optional
-from exceptions import LoxRuntimeError
-from tokens import Token
-from lox_callable import LoxCallable
-from lox_function import LoxFunction
+from .environment import Environment
+from .exceptions import LoxRuntimeError
+from .tokens import Token
+from .lox_callable import LoxCallable
+from .lox_function import LoxFunction
 
 
 class LoxClass(LoxCallable):
@@ -10,30 +11,39 @@ class LoxClass(LoxCallable):
         self.name = name
         self.superclass = superclass
         self.methods = methods
+        # classes can't change once declared, so inherited methods are
+        # copied in instead of searched for on every lookup
+        self.method_table: Dict[str, LoxFunction] = {}
+        if superclass is not None:
+            self.method_table.update(superclass.method_table)
+        self.method_table.update(methods)
+        self.initializer = self.method_table.get("init", None)
+        self.n_params = self.initializer.arity() if self.initializer is not None else 0
 
     def __call__(self, interpreter: "Interpreter", arguments: List[Any]):
         instance = LoxInstance(self)
-        initializer = self.find_method("init")
+        initializer = self.initializer
         if initializer is not None:
-            initializer.bind(instance)(interpreter, arguments)
+            interpreter.call_stack.append((self.name, interpreter.call_site))
+            # the closure a bound init would get, without the bound LoxFunction
+            environment = Environment(initializer.closure)
+            environment.define("this", instance)
+            initializer(interpreter, arguments, environment)
+            interpreter.call_stack.pop()
         return instance
 
     def  __str__(self):
         return self.name
 
     def arity(self) -> int:
-        initializer = self.find_method("init")
-        if initializer is None:
-            return 0
-        return initializer.arity()
+        return self.n_params
 
     def find_method(self, name: str) -> Optional[LoxFunction]:
-        method = self.methods.get(name, None)
-        if method is None and self.superclass is not None:
-            return self.superclass.find_method(name)
-        return method
+        return self.method_table.get(name, None)
 
 class LoxInstance:
+    __slots__ = ("klass", "fields")
+
     def __init__(self, klass: LoxClass):
         self.klass = klass
         self.fields: Dict[str, Any] = {}
@@ -45,7 +55,7 @@ class LoxInstance:
         if name.lexeme in self.fields:
             return self.fields[name.lexeme]
 
-        method: Optional[LoxFunction] = self.klass.find_method(name.lexeme)
+        method: Optional[LoxFunction] = self.klass.method_table.get(name.lexeme, None)
         if method is not None:
             return method.bind(self)
             
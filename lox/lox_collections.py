@@ -0,0 +1,78 @@
+from typing import Any, Dict, List, Optional
+from .exceptions import LoxRuntimeError
+from .lox_native import NativeInstance, check_index, lox_native
+
+
+class LoxList(NativeInstance):
+    def __init__(self, items: Optional[List[Any]] = None):
+        self.items: List[Any] = items if items is not None else []
+
+    def get_at(self, interpreter: "Interpreter", index: Any) -> Any:
+        return self.items[check_index(interpreter, index, len(self.items))]
+
+    def set_at(self, interpreter: "Interpreter", index: Any, value: Any) -> Any:
+        self.items[check_index(interpreter, index, len(self.items))] = value
+        return value
+
+    def append(self, interpreter: "Interpreter", value: Any) -> Any:
+        self.items.append(value)
+        return value
+
+    def pop(self, interpreter: "Interpreter") -> Any:
+        if not self.items:
+            raise LoxRuntimeError(interpreter.call_site, "Can't pop from an empty list.")
+        return self.items.pop()
+
+    def length(self, interpreter: "Interpreter") -> float:
+        return float(len(self.items))
+
+    methods = {
+        "get": (1, get_at),
+        "set": (2, set_at),
+        "append": (1, append),
+        "pop": (0, pop),
+        "len": (0, length),
+    }
+
+
+class LoxMap(NativeInstance):
+    def __init__(self):
+        self.entries: Dict[Any, Any] = {}
+
+    def get_key(self, interpreter: "Interpreter", key: Any) -> Any:
+        return self.entries.get(key, None)
+
+    def set_key(self, interpreter: "Interpreter", key: Any, value: Any) -> Any:
+        self.entries[key] = value
+        return value
+
+    def has(self, interpreter: "Interpreter", key: Any) -> bool:
+        return key in self.entries
+
+    def remove(self, interpreter: "Interpreter", key: Any) -> Any:
+        return self.entries.pop(key, None)
+
+    def length(self, interpreter: "Interpreter") -> float:
+        return float(len(self.entries))
+
+    def keys(self, interpreter: "Interpreter") -> LoxList:
+        return LoxList(list(self.entries))
+
+    methods = {
+        "get": (1, get_key),
+        "set": (2, set_key),
+        "has": (1, has),
+        "remove": (1, remove),
+        "len": (0, length),
+        "keys": (0, keys),
+    }
+
+
+@lox_native("List", 0)
+def make_list() -> LoxList:
+    return LoxList()
+
+
+@lox_native("Map", 0)
+def make_map() -> LoxMap:
+    return LoxMap()
@@ -0,0 +1,180 @@
+import math
+import operator
+from array import array
+from itertools import repeat
+from typing import Any, Callable, Dict, List
+from .exceptions import LoxRuntimeError, NativeError
+from .lox_callable import LoxCallable
+from .lox_collections import LoxList
+from .lox_native import NativeInstance, check_index, lox_native
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# ops `map` runs without calling back into Lox, by name
+MAP_OPS: Dict[str, Callable[[float], float]] = {
+    "abs": abs,
+    "ceil": lambda x: float(math.ceil(x)),
+    "exp": math.exp,
+    "floor": lambda x: float(math.floor(x)),
+    "log": math.log,
+    "neg": operator.neg,
+    "sqrt": math.sqrt,
+}
+# numpy ufuncs are named like the ops, except for these
+NUMPY_UFUNCS = {"neg": "negative"}
+
+
+def _storage(values: Any) -> Any:
+    # numpy arrays and memoryviews both slice into views and index to floats
+    if numpy is not None:
+        return numpy.fromiter(values, dtype=float)
+    return memoryview(array("d", values))
+
+
+class FloatArray(NativeInstance):
+    """Fixed-size array of floats whose bulk operations are one native call.
+
+    Backed by NumPy when it's installed and by array('d') otherwise. `slice`
+    returns a view that shares the elements of the array it came from.
+    """
+    def __init__(self, data: Any):
+        self.data = data
+
+    def __reduce__(self):
+        # memoryviews can't be pickled, a view is saved as a copy
+        return _restore, ([float(x) for x in self.data],)
+
+    def other(self, interpreter: "Interpreter", other: Any) -> Any:
+        if isinstance(other, FloatArray):
+            if len(other.data) != len(self.data):
+                raise LoxRuntimeError(interpreter.call_site, "Arrays must have the same length.")
+            return other.data
+        if isinstance(other, float):
+            return other
+        raise LoxRuntimeError(interpreter.call_site, "Operand must be a number or a FloatArray.")
+
+    def elementwise(self, interpreter: "Interpreter", other: Any, op: Callable[[float, float], float]) -> "FloatArray":
+        operand = self.other(interpreter, other)
+        if numpy is not None:
+            return FloatArray(op(self.data, operand))
+        if isinstance(operand, float):
+            return FloatArray(_storage(map(op, self.data, repeat(operand))))
+        return FloatArray(_storage(map(op, self.data, operand)))
+
+    def get_at(self, interpreter: "Interpreter", index: Any) -> float:
+        return float(self.data[check_index(interpreter, index, len(self.data))])
+
+    def set_at(self, interpreter: "Interpreter", index: Any, value: Any) -> Any:
+        if not isinstance(value, float):
+            raise LoxRuntimeError(interpreter.call_site, "FloatArray elements must be numbers.")
+        self.data[check_index(interpreter, index, len(self.data))] = value
+        return value
+
+    def length(self, interpreter: "Interpreter") -> float:
+        return float(len(self.data))
+
+    def add(self, interpreter: "Interpreter", other: Any) -> "FloatArray":
+        return self.elementwise(interpreter, other, operator.add)
+
+    def sub(self, interpreter: "Interpreter", other: Any) -> "FloatArray":
+        return self.elementwise(interpreter, other, operator.sub)
+
+    def mul(self, interpreter: "Interpreter", other: Any) -> "FloatArray":
+        return self.elementwise(interpreter, other, operator.mul)
+
+    def total(self, interpreter: "Interpreter") -> float:
+        if numpy is not None:
+            return float(self.data.sum())
+        return math.fsum(self.data)
+
+    def dot(self, interpreter: "Interpreter", other: Any) -> float:
+        if not isinstance(other, FloatArray):
+            raise LoxRuntimeError(interpreter.call_site, "Operand must be a FloatArray.")
+        operand = self.other(interpreter, other)
+        if numpy is not None:
+            return float(numpy.dot(self.data, operand))
+        return math.fsum(map(operator.mul, self.data, operand))
+
+    def minimum(self, interpreter: "Interpreter") -> float:
+        if len(self.data) == 0:
+            raise LoxRuntimeError(interpreter.call_site, "Array is empty.")
+        return float(self.data.min() if numpy is not None else min(self.data))
+
+    def maximum(self, interpreter: "Interpreter") -> float:
+        if len(self.data) == 0:
+            raise LoxRuntimeError(interpreter.call_site, "Array is empty.")
+        return float(self.data.max() if numpy is not None else max(self.data))
+
+    def map_op(self, interpreter: "Interpreter", fn: Any) -> "FloatArray":
+        if isinstance(fn, str):
+            if fn not in MAP_OPS:
+                raise LoxRuntimeError(interpreter.call_site, f"Unknown op '{fn}'.")
+            if numpy is not None:
+                with numpy.errstate(all="ignore"):
+                    result = getattr(numpy, NUMPY_UFUNCS.get(fn, fn))(self.data)
+                # report what math would have raised for, rather than nan or inf
+                if numpy.any(numpy.isfinite(self.data) & ~numpy.isfinite(result)):
+                    raise LoxRuntimeError(interpreter.call_site, "Math domain error.")
+                return FloatArray(result)
+            try:
+                return FloatArray(_storage(map(MAP_OPS[fn], self.data)))
+            except (ValueError, OverflowError):
+                raise LoxRuntimeError(interpreter.call_site, "Math domain error.")
+        if isinstance(fn, LoxCallable) and fn.arity() == 1:
+            results = [fn(interpreter, [float(x)]) for x in self.data]
+            if not all(isinstance(result, float) for result in results):
+                raise LoxRuntimeError(interpreter.call_site, "FloatArray elements must be numbers.")
+            return FloatArray(_storage(results))
+        raise LoxRuntimeError(interpreter.call_site, "Can only map an op name or a function of one argument.")
+
+    def slice_view(self, interpreter: "Interpreter", start: Any, end: Any) -> "FloatArray":
+        length = len(self.data)
+        if not (isinstance(start, float) and isinstance(end, float) and start.is_integer() and end.is_integer()):
+            raise LoxRuntimeError(interpreter.call_site, "Index must be an integer.")
+        if not 0 <= start <= end <= length:
+            raise LoxRuntimeError(interpreter.call_site, "Index out of range.")
+        return FloatArray(self.data[int(start):int(end)])
+
+    def fill(self, interpreter: "Interpreter", value: Any) -> "FloatArray":
+        if not isinstance(value, float):
+            raise LoxRuntimeError(interpreter.call_site, "FloatArray elements must be numbers.")
+        self.data[:] = _storage(repeat(value, len(self.data)))
+        return self
+
+    def to_list(self, interpreter: "Interpreter") -> LoxList:
+        return LoxList([float(x) for x in self.data])
+
+    methods = {
+        "get": (1, get_at),
+        "set": (2, set_at),
+        "len": (0, length),
+        "add": (1, add),
+        "sub": (1, sub),
+        "mul": (1, mul),
+        "sum": (0, total),
+        "dot": (1, dot),
+        "min": (0, minimum),
+        "max": (0, maximum),
+        "map": (1, map_op),
+        "slice": (2, slice_view),
+        "fill": (1, fill),
+        "toList": (0, to_list),
+    }
+
+
+def _restore(values: List[float]) -> FloatArray:
+    return FloatArray(_storage(values))
+
+
+@lox_native("FloatArray", 1)
+def make_float_array(source: Any) -> FloatArray:
+    if isinstance(source, LoxList):
+        if not all(isinstance(item, float) for item in source.items):
+            raise NativeError("FloatArray elements must be numbers.")
+        return FloatArray(_storage(source.items))
+    if isinstance(source, float) and source.is_integer() and source >= 0:
+        return FloatArray(_storage(repeat(0.0, int(source))))
+    raise NativeError("FloatArray needs a size or a List of numbers.")
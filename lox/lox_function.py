@@ -1,9 +1,9 @@
-from typing import Any, List
+from typing import Any, List, Optional
 import attr
-from environment import Environment
-from exceptions import ReturnStmtException
-from lox_callable import LoxCallable
-from stmt import Function
+from .environment import Environment
+from .exceptions import ReturnStmtException, TailCallException
+from .lox_callable import LoxCallable
+from .stmt import Function
 
 class LoxFunction(LoxCallable):
     def __init__(self, declaration: Function, closure: Environment, is_initializer: bool):
@@ -11,18 +11,37 @@ class LoxFunction(LoxCallable):
         self.closure = closure
         self.is_initializer = is_initializer
 
-    def __call__(self, interpreter: "Interpreter", arguments: List[Any]) -> Any:
-        environment = Environment(self.closure)
-        for param, argument in zip(self.declaration.params, arguments):
-            environment.define(param.lexeme, argument)
-        try:
-            interpreter.execute_block(self.declaration.body, environment)
-        except ReturnStmtException as e:
-            if self.is_initializer:
-                return self.closure.get_at(0, "this")
-            return e.value
-        if self.is_initializer:
-            return self.closure.get_at(0, "this")
+    def __call__(self, interpreter: "Interpreter", arguments: List[Any], closure: Optional[Environment] = None) -> Any:
+        # not popped when a runtime error unwinds, so the stack at the
+        # failure is still there for whoever reports it
+        call_stack = interpreter.call_stack
+        call_stack.append((self.declaration.name.lexeme, interpreter.call_site))
+        function = self
+        # super calls pass a closure with `this` bound instead of binding
+        # the method first
+        if closure is None:
+            closure = self.closure
+        # trampoline: a `return f(...)` hands its callee back here instead
+        # of nesting another Python call
+        while True:
+            environment = Environment(closure)
+            for param, argument in zip(function.declaration.params, arguments):
+                environment.define(param.lexeme, argument)
+            try:
+                interpreter.execute_block(function.declaration.body, environment)
+                value = None
+            except ReturnStmtException as e:
+                value = e.value
+            except TailCallException as e:
+                interpreter.call_site = e.call_site
+                function, arguments = e.callee, e.arguments
+                closure = function.closure
+                call_stack[-1] = (function.declaration.name.lexeme, e.call_site)
+                continue
+            call_stack.pop()
+            if function.is_initializer:
+                return closure.get_at(0, "this")
+            return value
 
     def __str__(self) -> str:
         return f"<fn {self.declaration.name.lexeme}>"
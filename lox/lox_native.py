@@ -0,0 +1,82 @@
+from typing import Any, Callable, ClassVar, Dict, List, Tuple
+from .exceptions import LoxRuntimeError, NativeError
+from .lox_callable import LoxCallable
+from .tokens import Token
+
+
+class NativeFunction(LoxCallable):
+    """A plain Python function callable from Lox.
+
+    Call sites that see one pass the evaluated arguments to `fn` positionally,
+    without the interpreter or an argument list. `fn` reports errors by
+    raising NativeError.
+    """
+    def __init__(self, name: str, arity: int, fn: Callable[..., Any]):
+        self.name = name
+        self.n_params = arity
+        self.fn = fn
+
+    def __call__(self, interpreter: "Interpreter", arguments: List[Any]) -> Any:
+        try:
+            return self.fn(*arguments)
+        except NativeError as e:
+            raise LoxRuntimeError(interpreter.call_site, e.message)
+
+    def __str__(self):
+        return "<native fn>"
+
+    def arity(self) -> int:
+        return self.n_params
+
+
+# global name -> native, every Interpreter defines them all
+NATIVES: Dict[str, NativeFunction] = {}
+
+
+def lox_native(name: str, arity: int, registry: Dict[str, NativeFunction] = NATIVES):
+    def register(fn: Callable[..., Any]) -> Callable[..., Any]:
+        registry[name] = NativeFunction(name, arity, fn)
+        return fn
+    return register
+
+
+# method name -> (arity, fn(receiver, interpreter, *arguments))
+MethodTable = Dict[str, Tuple[int, Callable[..., Any]]]
+
+
+class NativeInstance:
+    """A Lox value backed by a Python object, its methods are looked up with `.`
+    like those of a LoxInstance but it has no fields."""
+    methods: ClassVar[MethodTable] = {}
+
+    def get(self, name: Token) -> Any:
+        method = self.methods.get(name.lexeme, None)
+        if method is None:
+            raise LoxRuntimeError(name, f"Undefined property '{name.lexeme}'.")
+        arity, fn = method
+        return NativeMethod(self, arity, fn)
+
+
+class NativeMethod(LoxCallable):
+    def __init__(self, receiver: NativeInstance, arity: int, fn: Callable[..., Any]):
+        self.receiver = receiver
+        self._arity = arity
+        self.fn = fn
+
+    def __call__(self, interpreter: "Interpreter", arguments: List[Any]) -> Any:
+        return self.fn(self.receiver, interpreter, *arguments)
+
+    def __str__(self):
+        return "<native fn>"
+
+    def arity(self) -> int:
+        return self._arity
+
+
+def check_index(interpreter: "Interpreter", index: Any, length: int) -> int:
+    # errors from natives are reported at the call that reached them
+    if not isinstance(index, float) or not index.is_integer():
+        raise LoxRuntimeError(interpreter.call_site, "Index must be an integer.")
+    if not 0 <= index < length:
+        raise LoxRuntimeError(interpreter.call_site, "Index out of range.")
+    return int(index)
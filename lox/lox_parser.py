@@ -1,17 +1,22 @@
-from typing import Callable, List, Optional
+from typing import List, Optional
 import attr
-from exceptions import ParseException
-from expr import Assign, Binary, Call, Expr, Get, Grouping, Literal, Logical, Set, Super, This, Unary, Variable
-from stmt import Block, Break, Class, Expression, Function, If, Return, Stmt, Print, Var, While
-from token_type import TokenType
-from tokens import Token
+from .exceptions import ParseException
+from .expr import Assign, Binary, Call, Expr, Get, Grouping, Literal, Logical, Set, Super, This, Unary, Variable
+from .source_map import Report
+from .stmt import Block, Break, Class, Expression, Function, If, Import, Return, Stmt, Print, Var, While
+from .token_type import TokenType
+from .tokens import Token
 
 @attr.s(auto_attribs=True)
 class Parser:
     tokens: List[Token]
-    report: Callable[[int, str, str], None]
+    report: Report
     current: int = 0
 
+    def reset(self, tokens: List[Token]):
+        self.tokens = tokens
+        self.current = 0
+
     def parse(self):
         statements: List[Stmt] = []
         while not self.is_at_end():
@@ -58,6 +63,8 @@ class Parser:
             return self.for_statement()
         if self.match(TokenType.IF):
             return self.if_statement(within_loop)
+        if self.match(TokenType.IMPORT):
+            return self.import_statement()
         if self.match(TokenType.PRINT):
             return self.print_statement()
         if self.match(TokenType.RETURN):
@@ -89,6 +96,7 @@ class Parser:
         return If(condition, then_branch, else_branch)
 
     def for_statement(self) -> Stmt:
+        keyword = self.previous()
         self.consume(TokenType.LEFT_PAREN, "Expect '(' after 'for'.")
         
         initializer: Stmt
@@ -119,7 +127,7 @@ class Parser:
 
         if condition is None:
             condition = Literal(True)
-        body = While(condition, body)
+        body = While(keyword, condition, body)
 
         if initializer is not None:
             body = Block([initializer, body])
@@ -130,6 +138,12 @@ class Parser:
         self.consume(TokenType.SEMICOLON, "Expect ';' after value.")
         return Print(value)
 
+    def import_statement(self) -> Stmt:
+        keyword = self.previous()
+        path = self.consume(TokenType.STRING, "Expect module path string after 'import'.")
+        self.consume(TokenType.SEMICOLON, "Expect ';' after module path.")
+        return Import(keyword, path)
+
     def return_statement(self) -> Stmt:
         keyword = self.previous()
         value: Optional[Expr] = None
@@ -148,11 +162,12 @@ class Parser:
         return Var(name, initial_value)
 
     def while_statement(self) -> Stmt:
+        keyword = self.previous()
         self.consume(TokenType.LEFT_PAREN, "Expect '(' after 'while'.")
         condition = self.expression()
         self.consume(TokenType.RIGHT_PAREN, "Expect ')' after 'while'.")
         body = self.statement(True)
-        return While(condition, body)
+        return While(keyword, condition, body)
 
     def expression_statement(self) -> Stmt:
         expr = self.expression()
@@ -341,9 +356,9 @@ class Parser:
 
     def error(self, token: Token, msg: str) -> "ParseException":
         if token.token_type == TokenType.EOF:
-            self.report(token.line, " at end", msg)
+            self.report(token.source_map, token.offset, " at end", msg)
         else:
-            self.report(token.line, f" at '{token.lexeme}'", msg)
+            self.report(token.source_map, token.offset, f" at '{token.lexeme}'", msg)
         return ParseException()
 
     def synchronize(self):
@@ -0,0 +1,46 @@
+from typing import List, Optional, Sequence, Tuple
+from .tokens import Token
+
+Frame = Tuple[str, Optional[Token]]
+
+# frames shown at each end of a longer stack
+TRACEBACK_LIMIT = 10
+
+
+def format_traceback(token: Optional[Token], call_stack: Sequence[Frame]) -> List[str]:
+    """Where a runtime error happened, innermost call first, built from the
+    interpreter's shadow stack as it was when the error was raised.
+
+    Each line gives the function and the line it had reached, which for
+    every frame but the innermost is the line it made the next call from.
+    Runs of the same line, as in a recursion, are shown once. Calls made
+    from Python rather than from Lox have no line.
+    """
+    entries: List[Tuple[Optional[int], str]] = []
+    line = token.line if token is not None else None
+    for name, call_site in reversed(call_stack):
+        entries.append((line, f"{name}()"))
+        line = call_site.line if call_site is not None else None
+    entries.append((line, "script"))
+
+    lines: List[str] = []
+    repeated = 0
+    for i, entry in enumerate(entries):
+        if i > 0 and entry == entries[i - 1]:
+            repeated += 1
+            continue
+        if repeated:
+            lines.append(repeat_note(repeated))
+            repeated = 0
+        lines.append(f"[line {entry[0]}] in {entry[1]}" if entry[0] is not None else f"in {entry[1]}")
+    if repeated:
+        lines.append(repeat_note(repeated))
+
+    if len(lines) > 2 * TRACEBACK_LIMIT:
+        hidden = len(lines) - 2 * TRACEBACK_LIMIT
+        lines[TRACEBACK_LIMIT:-TRACEBACK_LIMIT] = [f"  ... {hidden} more lines"]
+    return lines
+
+
+def repeat_note(repeated: int) -> str:
+    return f"  [previous line repeated {repeated} more time{'s' if repeated > 1 else ''}]"
@@ -0,0 +1,107 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, MutableSet
+import attr
+from .expr import Call, Expr
+from .lox_parser import Parser
+from .resolver import Resolver
+from .scanner import Scanner
+from .source_map import SourceMap, format_error
+from .stmt import Block, Import, Stmt
+from .type_inference import specialize_types
+
+
+@attr.s(auto_attribs=True, eq=False)
+class Module:
+    """A compiled module file: its resolved statements, and what the resolver
+    reported about them, so that any interpreter can run it."""
+    path: str
+    statements: List[Stmt] = attr.Factory(list)
+    lox_locals: Dict[Expr, int] = attr.Factory(dict)
+    flat_blocks: MutableSet[Block] = attr.Factory(set)
+    tail_calls: MutableSet[Call] = attr.Factory(set)
+    import_paths: Dict[Import, str] = attr.Factory(dict)
+    errors: List[str] = attr.Factory(list)
+
+    # the resolver reports to a module as if it were the interpreter
+    def resolve(self, expr: Expr, depth: int):
+        self.lox_locals[expr] = depth
+
+    def flatten(self, block: Block):
+        self.flat_blocks.add(block)
+
+    def tail_call(self, expr: Call):
+        self.tail_calls.add(expr)
+
+    def resolve_import(self, stmt: Import, path: str):
+        self.import_paths[stmt] = path
+
+    def report(self, source_map: SourceMap, offset: int, where: str, msg: str):
+        self.errors.append(format_error(source_map, offset, where, msg))
+
+
+# absolute path -> module, each file is compiled once per process
+_compiled: Dict[str, Module] = {}
+
+
+def compile_module(path: str) -> Module:
+    try:
+        with open(path, 'r') as f:
+            source = f.read()
+    except OSError as e:
+        module = Module(path)
+        module.errors.append(f"Can't read '{path}': {e.strerror}.")
+        return module
+    return compile_source(source, path, os.path.dirname(path))
+
+
+def compile_source(source: str, path: str, base_dir: str) -> Module:
+    """Compiles `source` under the name `path`, which needn't be a file;
+    its imports are found relative to `base_dir`."""
+    module = Module(path)
+    tokens = Scanner(source, module.report).scan_tokens()
+    statements = Parser(tokens, module.report).parse()
+    if module.errors:
+        return module
+    Resolver(module, module.report, base_dir=base_dir).resolve(statements)
+    if module.errors:
+        return module
+    # modules aren't inlined, a later import could redefine anything they call
+    specialize_types(statements, module.lox_locals, module.flat_blocks)
+    module.statements = statements
+    return module
+
+
+def load_module(path: str) -> Module:
+    module = _compiled.get(path, None)
+    if module is None:
+        module = _compiled[path] = compile_module(path)
+    return module
+
+
+def load_modules(paths: Iterable[str], workers: int = 1) -> List[Module]:
+    """Compiles every module reachable from `paths` that isn't cached yet and
+    returns all of them.
+
+    With more than one worker, each wave of newly discovered imports is
+    compiled in a process pool.
+    """
+    loaded: Dict[str, Module] = {}
+    pending = list(dict.fromkeys(paths))
+    pool = None
+    try:
+        while pending:
+            uncached = [path for path in pending if path not in _compiled]
+            if workers > 1 and len(uncached) > 1:
+                if pool is None:
+                    pool = ProcessPoolExecutor(workers)
+                for module in pool.map(compile_module, uncached):
+                    _compiled[module.path] = module
+            for path in pending:
+                loaded[path] = load_module(path)
+            discovered = [imported for path in pending for imported in loaded[path].import_paths.values()]
+            pending = [path for path in dict.fromkeys(discovered) if path not in loaded]
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return list(loaded.values())
@@ -0,0 +1,29 @@
+from typing import Optional, Union
+from .expr import Assign, Binary, Call, Expr, Get, Grouping, Literal, Logical, Set, Super, This, Unary, Variable
+from .stmt import Block, Break, Class, Expression, Function, If, Import, Print, Return, Stmt, Var, While
+from .tokens import Token
+
+Node = Union[Expr, Stmt]
+
+
+def node_token(node: Node) -> Optional[Token]:
+    """Returns the token that best locates a node in the source. Nodes that
+    carry no token of their own borrow one from their first child."""
+    if isinstance(node, (Assign, Get, Set, Variable, Class, Function, Var)):
+        return node.name
+    if isinstance(node, (Binary, Logical, Unary)):
+        return node.operator
+    if isinstance(node, Call):
+        return node.paren
+    if isinstance(node, (Super, This, Break, Import, Return, While)):
+        return node.keyword
+    if isinstance(node, (Grouping, Expression, Print)):
+        return node_token(node.expression)
+    if isinstance(node, If):
+        return node_token(node.condition)
+    if isinstance(node, Block):
+        for statement in node.statements:
+            token = node_token(statement)
+            if token is not None:
+                return token
+    return None
@@ -0,0 +1,71 @@
+import signal
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+ROOT = "<script>"
+
+
+class Profiler:
+    """Samples the interpreter's shadow call stack on a timer and writes the
+    counts in the collapsed-stack format flamegraph tools read.
+
+    Uses SIGPROF where setitimer is available, so only CPU time is sampled,
+    and a sampling thread elsewhere.
+    """
+    def __init__(self, interpreter: "Interpreter", interval: float = 0.005):
+        self.interpreter = interpreter
+        self.interval = interval
+        self.samples: Dict[Tuple[Tuple[str, Any], ...], int] = {}
+        self.previous_handler: Any = None
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+
+    def start(self):
+        self.running = True
+        if hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread():
+            self.previous_handler = signal.signal(signal.SIGPROF, self.on_signal)
+            signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        else:
+            self.thread = threading.Thread(target=self.run_sampler, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        else:
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, self.previous_handler)
+
+    def on_signal(self, signum: int, frame: Any):
+        self.sample()
+
+    def run_sampler(self):
+        while self.running:
+            time.sleep(self.interval)
+            self.sample()
+
+    def sample(self):
+        # the frames themselves are immutable, copying the list is all the
+        # handler does; formatting waits until the profile is written
+        stack = tuple(self.interpreter.call_stack)
+        self.samples[stack] = self.samples.get(stack, 0) + 1
+
+    def collapsed(self) -> Dict[str, int]:
+        lines: Dict[str, int] = {}
+        for stack, count in self.samples.items():
+            frames = [ROOT]
+            for name, call_site in stack:
+                frames.append(name if call_site is None else f"{name}:{call_site.line}")
+            key = ";".join(frames)
+            lines[key] = lines.get(key, 0) + count
+        return lines
+
+    def write(self, filename: str):
+        with open(filename, "w") as f:
+            for stack, count in sorted(self.collapsed().items()):
+                f.write(f"{stack} {count}\n")
@@ -1,22 +1,53 @@
-from typing import Callable, Dict, List, Union
+import os
+from typing import Dict, List, MutableSet, Optional, Tuple, Union
 import attr
-from class_type import ClassType
-from expr import Assign, Binary, Call, Expr, ExprVisitor, Get, Grouping, Literal, Logical, Set, Super, This, Unary, Variable
-from function_type import FunctionType
-from interpreter import Interpreter
-from stmt import Block, Class, Expression, Function, If, Print, Return, Stmt, StmtVisitor, Var, While
-from tokens import Token
-
-Scope = Dict[str, bool]
+from .class_type import ClassType
+from .expr import Assign, Binary, Call, Expr, ExprVisitor, Get, Grouping, Literal, Logical, Set, Super, This, Unary, Variable
+from .function_type import FunctionType
+from .interpreter import Interpreter
+from .source_map import Report
+from .stmt import Block, Break, Class, Expression, Function, If, Import, Print, Return, Stmt, StmtVisitor, Var, While
+from .tokens import Token
+
 Resolvable = Union[List[Stmt], Stmt, Expr]
 
+
+class Scope(Dict[str, bool]):
+    def __init__(self, parent: Optional["Scope"], block: Optional[Block] = None, function: bool = False):
+        super().__init__()
+        self.parent = parent
+        self.block = block
+        self.function = function
+        # escape analysis: a scope whose variables are never read or written
+        # from a nested function can share its host's Environment
+        self.captured = False
+        self.flattened = False
+        self.storage: Optional[MutableSet[str]] = None
+
+
 @attr.s(auto_attribs=True)
 class Resolver(ExprVisitor[None], StmtVisitor[None]):
     interpreter: Interpreter
-    report: Callable[[int, str, str], None]
-    scopes: List[Scope] = []
+    report: Report
+    scopes: List[Scope] = attr.Factory(list)
     current_function: FunctionType = FunctionType.NONE
     current_class: ClassType = ClassType.NONE
+    # distances can only be computed once we know which of the scopes
+    # between a variable and its use are flattened
+    unresolved: List[Tuple[Expr, List[Scope]]] = attr.Factory(list)
+    block_scopes: List[Scope] = attr.Factory(list)
+    # import paths are relative to the importing file
+    base_dir: str = "."
+
+    def reset(self, base_dir: str):
+        """Prepares for another program; the state is already clean after
+        one that resolved without errors."""
+        self.scopes.clear()
+        self.current_function = FunctionType.NONE
+        self.current_class = ClassType.NONE
+        self.unresolved.clear()
+        self.block_scopes.clear()
+        self.base_dir = base_dir
 
     def resolve(self, resolvable: Resolvable):
         if isinstance(resolvable, List):
@@ -29,7 +60,7 @@ class Resolver(ExprVisitor[None], StmtVisitor[None]):
         enclosing_function = self.current_function
         self.current_function = function_type
 
-        self.begin_scope()
+        self.begin_scope(function=True)
         for param in function.params:
             self.declare(param)
             self.define(param)
@@ -38,13 +69,43 @@ class Resolver(ExprVisitor[None], StmtVisitor[None]):
         self.current_function = enclosing_function
 
     def error(self, token: Token, msg: str):
-        self.report(token.line, "", msg)
+        self.report(token.source_map, token.offset, "", msg)
 
-    def begin_scope(self):
-        self.scopes.append({})
+    def begin_scope(self, block: Optional[Block] = None, function: bool = False):
+        parent = self.scopes[-1] if self.scopes else None
+        scope = Scope(parent, block, function)
+        if block is not None:
+            self.block_scopes.append(scope)
+        self.scopes.append(scope)
 
     def end_scope(self):
         self.scopes.pop()
+        if not self.scopes:
+            self.flatten_scopes()
+
+    def flatten_scopes(self):
+        # block scopes are recorded outermost first, so a block's host is
+        # always decided before the block itself
+        for scope in self.block_scopes:
+            host = scope.parent
+            while host is not None and host.flattened:
+                host = host.parent
+            # never flatten into globals, leftover names would become visible
+            # to unresolved lookups
+            if host is None or scope.captured:
+                continue
+            if host.storage is None:
+                host.storage = set(host.keys())
+            if host.storage.isdisjoint(scope.keys()):
+                scope.flattened = True
+                host.storage.update(scope.keys())
+                self.interpreter.flatten(scope.block)
+        self.block_scopes.clear()
+
+        for expr, chain in self.unresolved:
+            distance = sum(1 for scope in chain[1:] if not scope.flattened)
+            self.interpreter.resolve(expr, distance)
+        self.unresolved.clear()
 
     def peek(self):
         return self.scopes[-1]
@@ -65,7 +126,10 @@ class Resolver(ExprVisitor[None], StmtVisitor[None]):
     def resolve_local(self, expr: Expr, name: Token):
         for i in range(len(self.scopes) - 1, -1, -1):
             if name.lexeme in self.scopes[i].keys():
-                self.interpreter.resolve(expr, len(self.scopes) - 1 - i)
+                chain = self.scopes[i:]
+                if any(scope.function for scope in chain[1:]):
+                    self.scopes[i].captured = True
+                self.unresolved.append((expr, chain))
                 return
         # i = 0
         # scopes = self.scopes[:]
@@ -77,10 +141,13 @@ class Resolver(ExprVisitor[None], StmtVisitor[None]):
         #     i += 1
 
     def visit_block_stmt(self, stmt: Block):
-        self.begin_scope()
+        self.begin_scope(stmt)
         self.resolve(stmt.statements)
         self.end_scope()
 
+    def visit_break_stmt(self, stmt: Break):
+        return
+
     def visit_class_stmt(self, stmt: Class):
         enclosing_class: ClassType = self.current_class
         self.current_class = ClassType.CLASS
@@ -127,6 +194,12 @@ class Resolver(ExprVisitor[None], StmtVisitor[None]):
         if stmt.else_branch is not None:
             self.resolve(stmt.else_branch)
 
+    def visit_import_stmt(self, stmt: Import):
+        if self.scopes:
+            self.error(stmt.keyword, "Can only import at top level.")
+            return
+        self.interpreter.resolve_import(stmt, os.path.abspath(os.path.join(self.base_dir, stmt.path.literal)))
+
     def visit_print_stmt(self, stmt: Print):
         self.resolve(stmt.expression)
 
@@ -137,6 +210,9 @@ class Resolver(ExprVisitor[None], StmtVisitor[None]):
             if self.current_function == FunctionType.INITIALIZER:
                 self.error(stmt.keyword, "Can't return a value from an initializer.")
             self.resolve(stmt.value)
+            # nothing runs in this frame after the callee, so it can reuse it
+            if isinstance(stmt.value, Call):
+                self.interpreter.tail_call(stmt.value)
 
     def visit_var_stmt(self, stmt: Var):
         self.declare(stmt.name)
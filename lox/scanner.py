@@ -1,45 +1,65 @@
-from typing import Any, Callable, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
-from tokens import Token
-from token_type import TokenType
+from .source_map import Report, SourceMap
+from .tokens import Token
+from .token_type import TokenType
+
+
+KEYWORDS: Dict[str, TokenType] = {
+    "and": TokenType.AND,
+    "break": TokenType.BREAK,
+    "class": TokenType.CLASS,
+    "else": TokenType.ELSE,
+    "false": TokenType.FALSE,
+    "for": TokenType.FOR,
+    "fun": TokenType.FUN,
+    "if": TokenType.IF,
+    "import": TokenType.IMPORT,
+    "nil": TokenType.NIL,
+    "or": TokenType.OR,
+    "print": TokenType.PRINT,
+    "return": TokenType.RETURN,
+    "super": TokenType.SUPER,
+    "this": TokenType.THIS,
+    "true": TokenType.TRUE,
+    "var": TokenType.VAR,
+    "while": TokenType.WHILE
+}
+
+
+# ASCII only, like the byte scanner, so both read a file the same way
+def is_digit(c: str) -> bool:
+    return "0" <= c <= "9"
+
+
+def is_alpha(c: str) -> bool:
+    return "a" <= c <= "z" or "A" <= c <= "Z" or c == "_"
+
+
+def is_alpha_numeric(c: str) -> bool:
+    return is_alpha(c) or is_digit(c)
 
 
 class Scanner():
-    def __init__(self, source: str, error: Callable[[int, str], None]):
-        self.error = error
+    def __init__(self, source: str, report: Report):
+        self.report = report
+        self.reset(source)
+
+    def reset(self, source: str):
+        """Starts over on new source, so one scanner can serve many runs."""
         self.tokens: List[Token] = []
         self.start = 0
         self.current = 0
-        self.line = 1
 
         self.source = source
-
-        self.keywords: Dict[str, TokenType] = {
-            "and": TokenType.AND,
-            "break": TokenType.BREAK,
-            "class": TokenType.CLASS,
-            "else": TokenType.ELSE,
-            "false": TokenType.FALSE,
-            "for": TokenType.FOR,
-            "fun": TokenType.FUN,
-            "if": TokenType.IF,
-            "nil": TokenType.NIL,
-            "or": TokenType.OR,
-            "print": TokenType.PRINT,
-            "return": TokenType.RETURN,
-            "super": TokenType.SUPER,
-            "this": TokenType.THIS,
-            "true": TokenType.TRUE,
-            "var": TokenType.VAR,
-            "while": TokenType.WHILE
-        }
+        self.source_map = SourceMap(source)
 
     def scan_tokens(self):
         while self.current < len(self.source):
             self.start = self.current
             self.scan_token()
         
-        self.tokens.append(Token(TokenType.EOF, "", None, self.line))
+        self.tokens.append(Token(TokenType.EOF, "", None, len(self.source), self.source_map))
         return self.tokens
 
     def scan_token(self):
@@ -92,18 +112,19 @@ class Scanner():
                     self.current += 1
             else:
                 self.add_token(TokenType.SLASH)
-        elif c in [" ", "\r", "\t"]:
+        elif c in [" ", "\r", "\t", "\n"]:
             pass # ignore whitespace
-        elif c == "\n":
-            self.line += 1
         elif c == '"':
             self.string()
-        elif c.isdigit():
+        elif is_digit(c):
             self.number()
-        elif c.isalpha() or c == "_":
+        elif is_alpha(c):
             self.identifier()
         else:
-            self.error(self.line, "Unexpected character.")
+            self.error("Unexpected character.")
+
+    def error(self, msg: str):
+        self.report(self.source_map, self.start, "", msg)
 
     def advance(self) -> str:
         c = self.source[self.current]
@@ -111,11 +132,11 @@ class Scanner():
         return c
 
     def add_token(self, token_type: TokenType, literal: Optional[Any] = None):
-        token = Token(token_type, self.source[self.start:self.current], literal, self.line)
+        token = Token(token_type, self.source[self.start:self.current], literal, self.start, self.source_map)
         self.tokens.append(token)
 
     def is_at_end(self) -> bool:
-        return self.current > len(self.source)
+        return self.current >= len(self.source)
 
     def match(self, expected: str) -> bool:
         if self.is_at_end():
@@ -131,18 +152,16 @@ class Scanner():
         return self.source[self.current]
 
     def peek_next(self) -> str:
-        if self.current + 1 > len(self.source):
+        if self.current + 1 >= len(self.source):
             return "\0"
         return self.source[self.current + 1]
 
     def string(self):
         while self.peek() != '"' and not self.is_at_end():
-            if self.peek() == "\n":
-                self.line += 1
             self.advance()
         
         if self.is_at_end():
-            self.error(self.line, "Unterminated string.")
+            self.error("Unterminated string.")
             return
 
         self.advance() # consume closing "
@@ -151,20 +170,20 @@ class Scanner():
         self.add_token(TokenType.STRING, value)
 
     def number(self):
-        while self.peek().isdigit():
+        while is_digit(self.peek()):
             self.advance()
         
-        if self.peek() == "." and self.peek_next().isdigit():
+        if self.peek() == "." and is_digit(self.peek_next()):
             self.advance()
 
-        while self.peek().isdigit():
+        while is_digit(self.peek()):
             self.advance()
 
         self.add_token(TokenType.NUMBER, float(self.source[self.start:self.current]))
 
     def identifier(self):
-        while self.peek().isalnum() or self.peek() == "_":
+        while is_alpha_numeric(self.peek()):
             self.advance()
         text = self.source[self.start:self.current]
-        token_type = self.keywords.get(text, TokenType.IDENTIFIER)
+        token_type = KEYWORDS.get(text, TokenType.IDENTIFIER)
         self.add_token(token_type)
\ No newline at end of file
@@ -0,0 +1,76 @@
+import mmap
+from bisect import bisect_right
+from typing import Callable, List, Optional, Tuple, Union
+
+Source = Union[str, bytes, mmap.mmap]
+
+
+class SourceMap:
+    """Turns offsets into the source into lines and columns.
+
+    Scanners only record offsets; the index of line starts is built the
+    first time a position is asked for, which usually means an error.
+    Columns count characters and start at 1, like lines.
+    """
+    def __init__(self, source: Optional[Source], line_starts: Optional[List[int]] = None):
+        self.source = source
+        self.line_starts = line_starts
+
+    def index(self) -> List[int]:
+        if self.line_starts is None:
+            newline = "\n" if isinstance(self.source, str) else b"\n"
+            starts = [0]
+            offset = self.source.find(newline)
+            while offset != -1:
+                starts.append(offset + 1)
+                offset = self.source.find(newline, offset + 1)
+            self.line_starts = starts
+        return self.line_starts
+
+    def line(self, offset: int) -> int:
+        return bisect_right(self.index(), offset)
+
+    def position(self, offset: int) -> Tuple[int, int]:
+        line = self.line(offset)
+        if self.source is None:
+            return line, 0
+        start = self.line_starts[line - 1]
+        prefix = self.source[start:offset]
+        if not isinstance(prefix, str):
+            prefix = prefix.decode("utf-8", "replace")
+        return line, len(prefix) + 1
+
+    def describe(self, offset: int) -> str:
+        line, column = self.position(offset)
+        return f"line {line}" if column == 0 else f"line {line}, column {column}"
+
+    def excerpt(self, offset: int) -> str:
+        """The line holding `offset`, with a caret under it, or "" when the
+        source is gone."""
+        if self.source is None:
+            return ""
+        line, column = self.position(offset)
+        starts = self.line_starts
+        end = starts[line] - 1 if line < len(starts) else len(self.source)
+        text = self.source[starts[line - 1]:end]
+        if not isinstance(text, str):
+            text = text.decode("utf-8", "replace")
+        text = text.rstrip("\r")
+        # keep tabs so the caret lines up however they're displayed
+        marker = "".join("\t" if c == "\t" else " " for c in text[:column - 1]) + "^"
+        return f"    {text}\n    {marker}"
+
+    def __reduce__(self):
+        # a mapped file can't be pickled, positions still work without it
+        source = None if isinstance(self.source, mmap.mmap) else self.source
+        return SourceMap, (source, self.index())
+
+
+# where an error was found, how the parser describes it, and what it is
+Report = Callable[[SourceMap, int, str, str], None]
+
+
+def format_error(source_map: SourceMap, offset: int, where: str, msg: str) -> str:
+    excerpt = source_map.excerpt(offset)
+    error = f"[{source_map.describe(offset)}] Error{where}: {msg}"
+    return f"{error}\n{excerpt}" if excerpt else error
@@ -0,0 +1,293 @@
+from typing import Any, Dict, Generator, List, Optional, Union
+from .environment import Environment
+from .exceptions import BreakStmtException, LoxRuntimeError, ReturnStmtException, TailCallException
+from .expr import Assign, Binary, Call, Expr, ExprVisitor, Get, Grouping, Logical, Set, Unary
+from .inliner import children
+from .interpreter import Interpreter
+from .lox_class import LoxClass, LoxInstance
+from .lox_function import LoxFunction
+from .lox_native import NativeInstance
+from .stmt import Block, Expression, If, Print, Return, Stmt, StmtVisitor, Var, While
+from .token_type import TokenType
+from .tokens import Token
+from .typed_expr import TypedBinary, TypedDivide, TypedUnary
+
+Node = Union[Expr, Stmt]
+# a suspended node evaluation, yields the child nodes it needs and is sent
+# their values back
+Step = Generator[Node, Any, Any]
+
+
+class StacklessInterpreter(Interpreter):
+    """Runs Lox calls without nesting Python calls.
+
+    Every node that contains a call is evaluated by a generator from `Steps`,
+    and those generators live on a list instead of the C stack, so the Lox
+    call depth is bounded by `max_stack` only. Subtrees without calls are as
+    deep as the source is, they go through the ordinary recursive visitor.
+    """
+    def __init__(self, max_stack: int = 100000):
+        super().__init__()
+        self.max_stack = max_stack
+        self.steps = Steps(self)
+        self.call_free: Dict[Node, bool] = {}
+
+    def execute(self, stmt: Stmt):
+        if self.is_call_free(stmt):
+            stmt.accept(self)
+        else:
+            self.steps.run(stmt)
+
+    def forget_nodes(self, nodes: List[Any]):
+        super().forget_nodes(nodes)
+        for node in nodes:
+            self.call_free.pop(node, None)
+
+    def is_call_free(self, node: Node) -> bool:
+        free = self.call_free.get(node, None)
+        if free is None:
+            free = not isinstance(node, Call) and all(self.is_call_free(child) for child in child_nodes(node))
+            self.call_free[node] = free
+        return free
+
+
+def child_nodes(node: Node) -> List[Node]:
+    # function and class bodies don't run when they are declared
+    if isinstance(node, Expr):
+        return children(node)
+    if isinstance(node, Block):
+        return node.statements
+    if isinstance(node, (Expression, Print)):
+        return [node.expression]
+    if isinstance(node, If):
+        return [node.condition, node.then_branch] + ([node.else_branch] if node.else_branch is not None else [])
+    if isinstance(node, Return):
+        return [node.value] if node.value is not None else []
+    if isinstance(node, Var):
+        return [node.initializer] if node.initializer is not None else []
+    if isinstance(node, While):
+        return [node.condition, node.body]
+    return []
+
+
+class Steps(ExprVisitor[Step], StmtVisitor[Step]):
+    """Generator versions of the visit methods for nodes that contain calls."""
+    def __init__(self, interpreter: StacklessInterpreter):
+        self.interpreter = interpreter
+
+    def run(self, node: Node) -> Any:
+        interpreter = self.interpreter
+        frames: List[Step] = [node.accept(self)]
+        value: Any = None
+        error: Any = None
+        while True:
+            frame = frames[-1]
+            try:
+                if error is None:
+                    child = frame.send(value)
+                else:
+                    pending, error = error, None
+                    child = frame.throw(pending)
+            except StopIteration as stop:
+                frames.pop()
+                if not frames:
+                    return stop.value
+                value = stop.value
+                continue
+            except Exception as e:
+                # unwinds one frame at a time, so every generator's finally
+                # restores what it changed
+                frames.pop()
+                if not frames:
+                    raise
+                error = e
+                continue
+
+            value = None
+            if interpreter.is_call_free(child):
+                try:
+                    # through the interpreter's own methods, so hooks and
+                    # counters installed on them see these nodes
+                    if isinstance(child, Stmt):
+                        interpreter.execute(child)
+                    else:
+                        value = interpreter.evaluate(child)
+                except Exception as e:
+                    error = e
+            else:
+                frame = child.accept(self)
+                # node hooks see the nodes that never reach execute or evaluate
+                if interpreter.trace_frame is not None:
+                    frame = interpreter.trace_frame(child, frame)
+                frames.append(frame)
+
+    def call(self, callee: Any, arguments: List[Any], call_site: Token) -> Step:
+        interpreter = self.interpreter
+        interpreter.call_site = call_site
+        if isinstance(callee, LoxFunction):
+            return (yield from self.call_function(callee, arguments, call_site))
+        if isinstance(callee, LoxClass):
+            instance = LoxInstance(callee)
+            initializer = callee.initializer
+            if initializer is not None:
+                self.check_depth(call_site)
+                interpreter.call_stack.append((callee.name, call_site))
+                environment = Environment(initializer.closure)
+                environment.define("this", instance)
+                yield from self.call_function(initializer, arguments, call_site, environment)
+                interpreter.call_stack.pop()
+            return instance
+        return callee(interpreter, arguments)
+
+    def call_function(self, function: LoxFunction, arguments: List[Any], call_site: Token,
+                      closure: Optional[Environment] = None) -> Step:
+        interpreter = self.interpreter
+        call_stack = interpreter.call_stack
+        self.check_depth(call_site)
+        call_stack.append((function.declaration.name.lexeme, call_site))
+        if closure is None:
+            closure = function.closure
+        while True:
+            environment = Environment(closure)
+            for param, argument in zip(function.declaration.params, arguments):
+                environment.define(param.lexeme, argument)
+            previous = interpreter.environment
+            interpreter.environment = environment
+            try:
+                for statement in function.declaration.body:
+                    yield statement
+                value = None
+            except ReturnStmtException as e:
+                value = e.value
+            except TailCallException as e:
+                interpreter.call_site = e.call_site
+                function, arguments = e.callee, e.arguments
+                closure = function.closure
+                call_stack[-1] = (function.declaration.name.lexeme, e.call_site)
+                continue
+            finally:
+                interpreter.environment = previous
+            call_stack.pop()
+            if function.is_initializer:
+                return closure.get_at(0, "this")
+            return value
+
+    def check_depth(self, call_site: Token):
+        if len(self.interpreter.call_stack) >= self.interpreter.max_stack:
+            raise LoxRuntimeError(call_site, "Stack overflow.")
+
+    def visit_block_stmt(self, stmt: Block) -> Step:
+        interpreter = self.interpreter
+        if stmt in interpreter.flat_blocks:
+            for statement in stmt.statements:
+                yield statement
+            return
+        previous = interpreter.environment
+        interpreter.environment = Environment(previous)
+        try:
+            for statement in stmt.statements:
+                yield statement
+        finally:
+            interpreter.environment = previous
+
+    def visit_expression_stmt(self, stmt: Expression) -> Step:
+        yield stmt.expression
+
+    def visit_if_stmt(self, stmt: If) -> Step:
+        if self.interpreter.is_truthy((yield stmt.condition)):
+            yield stmt.then_branch
+        elif stmt.else_branch is not None:
+            yield stmt.else_branch
+
+    def visit_print_stmt(self, stmt: Print) -> Step:
+        value = yield stmt.expression
+        print(self.interpreter.stringify(value))
+
+    def visit_return_stmt(self, stmt: Return) -> Step:
+        interpreter = self.interpreter
+        value = None
+        if stmt.value in interpreter.tail_calls:
+            call: Call = stmt.value
+            callee = yield call.callee
+            arguments: List[Any] = []
+            for argument in call.arguments:
+                arguments.append((yield argument))
+            interpreter.check_call(call, callee, arguments)
+            if isinstance(callee, LoxFunction):
+                raise TailCallException(callee, arguments, call.paren)
+            value = yield from self.call(callee, arguments, call.paren)
+        elif stmt.value is not None:
+            value = yield stmt.value
+        raise ReturnStmtException(value)
+
+    def visit_var_stmt(self, stmt: Var) -> Step:
+        value = yield stmt.initializer
+        self.interpreter.environment.define(stmt.name.lexeme, value)
+
+    def visit_while_stmt(self, stmt: While) -> Step:
+        try:
+            while self.interpreter.is_truthy((yield stmt.condition)):
+                yield stmt.body
+        except BreakStmtException:
+            pass
+
+    def visit_assign_expr(self, expr: Assign) -> Step:
+        return self.interpreter.assign_variable(expr, (yield expr.value))
+
+    def visit_binary_expr(self, expr: Binary) -> Step:
+        left = yield expr.left
+        right = yield expr.right
+        return self.interpreter.binary(expr.operator, left, right)
+
+    def visit_typed_binary_expr(self, expr: TypedBinary) -> Step:
+        left = yield expr.left
+        right = yield expr.right
+        return expr.op(left, right)
+
+    def visit_typed_divide_expr(self, expr: TypedDivide) -> Step:
+        left = yield expr.left
+        right = yield expr.right
+        if right == 0:
+            raise LoxRuntimeError(expr.operator, "Cannot divide by zero.")
+        return left / right
+
+    def visit_call_expr(self, expr: Call) -> Step:
+        callee = yield expr.callee
+        arguments: List[Any] = []
+        for argument in expr.arguments:
+            arguments.append((yield argument))
+        self.interpreter.check_call(expr, callee, arguments)
+        return (yield from self.call(callee, arguments, expr.paren))
+
+    def visit_get_expr(self, expr: Get) -> Step:
+        obj = yield expr.object
+        if isinstance(obj, (LoxInstance, NativeInstance)):
+            return obj.get(expr.name)
+        raise LoxRuntimeError(expr.name, "Only instances have properties.")
+
+    def visit_grouping_expr(self, expr: Grouping) -> Step:
+        return (yield expr.expression)
+
+    def visit_logical_expr(self, expr: Logical) -> Step:
+        left = yield expr.left
+        if expr.operator.token_type == TokenType.OR:
+            if self.interpreter.is_truthy(left):
+                return left
+        else:
+            if not self.interpreter.is_truthy(left):
+                return left
+        return (yield expr.right)
+
+    def visit_set_expr(self, expr: Set) -> Step:
+        obj = yield expr.object
+        if not isinstance(obj, LoxInstance):
+            raise LoxRuntimeError(expr.name, "Only instances have fields.")
+        value = yield expr.value
+        obj.set(expr.name, value)
+        return value
+
+    def visit_unary_expr(self, expr: Unary) -> Step:
+        return self.interpreter.unary(expr.operator, (yield expr.right))
+
+    def visit_typed_unary_expr(self, expr: TypedUnary) -> Step:
+        return expr.op((yield expr.right))
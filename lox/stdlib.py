@@ -0,0 +1,190 @@
+import math
+import re
+from typing import Any, Callable, Dict, List
+from .exceptions import NativeError
+from .lox_collections import LoxList, LoxMap
+from .lox_native import NativeFunction, lox_native
+
+# the interpreter imports this module the first time a program reads a
+# global it doesn't define, and takes the native from here
+STDLIB: Dict[str, NativeFunction] = {}
+
+# a number literal as the scanner reads it, negated or not, between the
+# whitespace the scanner skips
+NUMBER = re.compile(r"[ \r\t\n]*(-?[0-9]+(\.[0-9]+)?)[ \r\t\n]*")
+
+
+def _number(value: Any) -> float:
+    if not isinstance(value, float):
+        raise NativeError("Argument must be a number.")
+    return value
+
+
+def _integer(value: Any) -> int:
+    if not isinstance(value, float) or not value.is_integer():
+        raise NativeError("Argument must be an integer.")
+    return int(value)
+
+
+def _string(value: Any) -> str:
+    if not isinstance(value, str):
+        raise NativeError("Argument must be a string.")
+    return value
+
+
+def _math(fn: Callable[..., float], *arguments: Any) -> float:
+    try:
+        return float(fn(*(_number(argument) for argument in arguments)))
+    except (ValueError, OverflowError):
+        raise NativeError("Math domain error.")
+
+
+@lox_native("sqrt", 1, STDLIB)
+def sqrt(x: Any) -> float:
+    return _math(math.sqrt, x)
+
+
+@lox_native("floor", 1, STDLIB)
+def floor(x: Any) -> float:
+    return _math(math.floor, x)
+
+
+@lox_native("ceil", 1, STDLIB)
+def ceil(x: Any) -> float:
+    return _math(math.ceil, x)
+
+
+@lox_native("round", 1, STDLIB)
+def round_half_up(x: Any) -> float:
+    return _math(lambda value: math.floor(value + 0.5), x)
+
+
+@lox_native("abs", 1, STDLIB)
+def absolute(x: Any) -> float:
+    return abs(_number(x))
+
+
+@lox_native("pow", 2, STDLIB)
+def power(x: Any, y: Any) -> float:
+    return _math(math.pow, x, y)
+
+
+@lox_native("exp", 1, STDLIB)
+def exp(x: Any) -> float:
+    return _math(math.exp, x)
+
+
+@lox_native("log", 1, STDLIB)
+def log(x: Any) -> float:
+    return _math(math.log, x)
+
+
+@lox_native("sin", 1, STDLIB)
+def sin(x: Any) -> float:
+    return _math(math.sin, x)
+
+
+@lox_native("cos", 1, STDLIB)
+def cos(x: Any) -> float:
+    return _math(math.cos, x)
+
+
+@lox_native("atan2", 2, STDLIB)
+def atan2(y: Any, x: Any) -> float:
+    return _math(math.atan2, y, x)
+
+
+@lox_native("min", 2, STDLIB)
+def minimum(a: Any, b: Any) -> float:
+    return min(_number(a), _number(b))
+
+
+@lox_native("max", 2, STDLIB)
+def maximum(a: Any, b: Any) -> float:
+    return max(_number(a), _number(b))
+
+
+@lox_native("len", 1, STDLIB)
+def length(value: Any) -> float:
+    if isinstance(value, str):
+        return float(len(value))
+    if isinstance(value, LoxList):
+        return float(len(value.items))
+    if isinstance(value, LoxMap):
+        return float(len(value.entries))
+    raise NativeError("Argument must be a string, List or Map.")
+
+
+@lox_native("substring", 3, STDLIB)
+def substring(s: Any, start: Any, end: Any) -> str:
+    s, start, end = _string(s), _integer(start), _integer(end)
+    if not 0 <= start <= end <= len(s):
+        raise NativeError("Index out of range.")
+    return s[start:end]
+
+
+@lox_native("indexOf", 2, STDLIB)
+def index_of(s: Any, needle: Any) -> float:
+    return float(_string(s).find(_string(needle)))
+
+
+@lox_native("startsWith", 2, STDLIB)
+def starts_with(s: Any, prefix: Any) -> bool:
+    return _string(s).startswith(_string(prefix))
+
+
+@lox_native("endsWith", 2, STDLIB)
+def ends_with(s: Any, suffix: Any) -> bool:
+    return _string(s).endswith(_string(suffix))
+
+
+@lox_native("upper", 1, STDLIB)
+def upper(s: Any) -> str:
+    return _string(s).upper()
+
+
+@lox_native("lower", 1, STDLIB)
+def lower(s: Any) -> str:
+    return _string(s).lower()
+
+
+@lox_native("trim", 1, STDLIB)
+def trim(s: Any) -> str:
+    return _string(s).strip()
+
+
+@lox_native("replace", 3, STDLIB)
+def replace(s: Any, old: Any, new: Any) -> str:
+    return _string(s).replace(_string(old), _string(new))
+
+
+@lox_native("split", 2, STDLIB)
+def split(s: Any, separator: Any) -> LoxList:
+    if _string(separator) == "":
+        raise NativeError("Separator must not be empty.")
+    return LoxList(_string(s).split(separator))
+
+
+@lox_native("join", 2, STDLIB)
+def join(items: Any, separator: Any) -> str:
+    if not isinstance(items, LoxList) or not all(isinstance(item, str) for item in items.items):
+        raise NativeError("Argument must be a List of strings.")
+    return _string(separator).join(items.items)
+
+
+@lox_native("toNumber", 1, STDLIB)
+def to_number(s: Any) -> Any:
+    # nil for anything Lox itself wouldn't scan as a number
+    match = NUMBER.fullmatch(_string(s))
+    if match is None:
+        return None
+    value = float(match.group(1))
+    return value if math.isfinite(value) else None
+
+
+@lox_native("formatNumber", 2, STDLIB)
+def format_number(x: Any, digits: Any) -> str:
+    places = _integer(digits)
+    if places < 0:
+        raise NativeError("Digits must not be negative.")
+    return f"{_number(x):.{places}f}"
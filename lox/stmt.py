@@ -1,7 +1,7 @@
 from abc import ABC
 from typing import Any, Generic, List, Optional, TypeVar
-from expr import Expr, Variable
-from tokens import Token
+from .expr import Expr, Variable
+from .tokens import Token
 
 R = TypeVar("R")
 
@@ -67,6 +67,15 @@ class If(Stmt):
 		return visitor.visit_if_stmt(self)
 
 
+class Import(Stmt):
+	def __init__(self, keyword: Token, path: Token):
+		self.keyword = keyword
+		self.path = path
+
+	def accept(self, visitor: "StmtVisitor[R]") -> R:
+		return visitor.visit_import_stmt(self)
+
+
 class Print(Stmt):
 	def __init__(self, expression: Expr):
 		self.expression = expression
@@ -94,7 +103,8 @@ class Var(Stmt):
 
 
 class While(Stmt):
-	def __init__(self, condition: Expr, body: Stmt):
+	def __init__(self, keyword: Token, condition: Expr, body: Stmt):
+		self.keyword = keyword
 		self.condition = condition
 		self.body = body
 
@@ -121,6 +131,9 @@ class StmtVisitor(ABC, Generic[R]):
 	def visit_if_stmt(self, stmt: If) -> R:
 		raise NotImplemented()
 
+	def visit_import_stmt(self, stmt: Import) -> R:
+		raise NotImplemented()
+
 	def visit_print_stmt(self, stmt: Print) -> R:
 		raise NotImplemented()
 
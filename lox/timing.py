@@ -0,0 +1,84 @@
+import gc
+import statistics
+import sys
+import time
+from typing import Any, List, Optional
+import attr
+from .exceptions import LoxRuntimeError
+from .lox_callable import LoxCallable
+from .lox_collections import LoxMap
+from .lox_native import lox_native
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+@lox_native("perf_counter", 0)
+def perf_counter() -> float:
+    # monotonic high-resolution seconds, only differences are meaningful
+    return time.perf_counter()
+
+
+@lox_native("perf_counter_ns", 0)
+def perf_counter_ns() -> float:
+    return float(time.perf_counter_ns())
+
+
+@attr.s(auto_attribs=True)
+class Benchmark(LoxCallable):
+    """benchmark(fn, iterations) calls fn with no arguments and returns a Map
+    of min/median/mean/total seconds per call."""
+    def __call__(self, interpreter: "Interpreter", arguments: List[Any]) -> Any:
+        fn, iterations = arguments
+        if not isinstance(fn, LoxCallable) or fn.arity() != 0:
+            raise LoxRuntimeError(interpreter.call_site, "Can only benchmark a function with no parameters.")
+        if not isinstance(iterations, float) or not iterations.is_integer() or iterations < 1:
+            raise LoxRuntimeError(interpreter.call_site, "Iterations must be a positive integer.")
+
+        call_site = interpreter.call_site
+        clock = time.perf_counter_ns
+        timings: List[int] = []
+        for _ in range(int(iterations)):
+            interpreter.call_site = call_site
+            start = clock()
+            fn(interpreter, [])
+            timings.append(clock() - start)
+
+        result = LoxMap()
+        result.entries = {
+            "min": min(timings) / 1e9,
+            "median": statistics.median(timings) / 1e9,
+            "mean": statistics.fmean(timings) / 1e9,
+            "total": sum(timings) / 1e9,
+            "iterations": float(len(timings)),
+        }
+        return result
+
+    def __str__(self):
+        return "<native fn>"
+
+    def arity(self) -> int:
+        return 2
+
+
+@lox_native("gc_stats", 0)
+def gc_stats() -> LoxMap:
+    result = LoxMap()
+    for generation, (stats, count) in enumerate(zip(gc.get_stats(), gc.get_count())):
+        result.entries[f"gen{generation}.collections"] = float(stats["collections"])
+        result.entries[f"gen{generation}.collected"] = float(stats["collected"])
+        result.entries[f"gen{generation}.uncollectable"] = float(stats["uncollectable"])
+        result.entries[f"gen{generation}.pending"] = float(count)
+    return result
+
+
+@lox_native("mem_usage", 0)
+def mem_usage() -> Optional[float]:
+    # peak resident set size in bytes, nil where the platform doesn't report it
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes everywhere except macOS
+    return float(peak if sys.platform == "darwin" else peak * 1024)
@@ -11,6 +11,6 @@ class TokenType(enum.Enum):
   IDENTIFIER, STRING, NUMBER = range(20, 23)
 
   # Keywords.
-  AND, BREAK, CLASS, ELSE, FALSE, FUN, FOR, IF, NIL, OR, PRINT, RETURN, SUPER, THIS, TRUE, VAR, WHILE = range(23, 40)
+  AND, BREAK, CLASS, ELSE, FALSE, FUN, FOR, IF, IMPORT, NIL, OR, PRINT, RETURN, SUPER, THIS, TRUE, VAR, WHILE = range(23, 41)
 
-  EOF = 40
\ No newline at end of file
+  EOF = 41
\ No newline at end of file
@@ -1,14 +1,20 @@
 from typing import Any
 import attr
-from token_type import TokenType
+from .source_map import SourceMap
+from .token_type import TokenType
 
 
 class Token:
-    def __init__(self, token_type: TokenType, lexeme: str, literal: Any, line: int):
+    def __init__(self, token_type: TokenType, lexeme: str, literal: Any, offset: int, source_map: SourceMap):
         self.token_type = token_type
         self.lexeme = lexeme
         self.literal = literal
-        self.line = line
+        self.offset = offset
+        self.source_map = source_map
+
+    @property
+    def line(self) -> int:
+        return self.source_map.line(self.offset)
 
     def __str__(self):
         return f"{self.token_type} {self.lexeme} {self.literal}"
\ No newline at end of file
@@ -0,0 +1,82 @@
+import json
+import time
+from typing import Dict, List, Optional, TextIO, Tuple
+from .node_token import Node, node_token
+
+
+class TraceCounter:
+    """Counts how often every statement and expression runs and how much time
+    each source line takes, excluding time spent in nodes on other lines.
+
+    Installing adds enter and exit hooks, which also see the nodes a
+    StacklessInterpreter runs in its own loop. An interpreter that never had
+    a counter installed runs exactly as before.
+    """
+    def __init__(self):
+        self.node_counts: Dict[Node, int] = {}
+        self.line_counts: Dict[int, int] = {}
+        self.line_times: Dict[int, float] = {}
+        self.node_lines: Dict[Node, int] = {}
+        self.current_line = 0
+        self.child_time = 0.0
+        # (enclosing line, its child time so far, start) of each running node
+        self.running: List[Tuple[int, float, float]] = []
+
+    def install(self, interpreter: "Interpreter"):
+        interpreter.add_hook("enter", self.enter)
+        interpreter.add_hook("exit", self.exit)
+
+    def uninstall(self, interpreter: "Interpreter"):
+        interpreter.remove_hook("enter", self.enter)
+        interpreter.remove_hook("exit", self.exit)
+
+    def line_of(self, node: Node) -> int:
+        line = self.node_lines.get(node, None)
+        if line is None:
+            token = node_token(node)
+            # literals and the like belong to whatever line contains them
+            line = self.current_line if token is None else token.line
+            self.node_lines[node] = line
+        return line
+
+    def enter(self, node: Node):
+        self.node_counts[node] = self.node_counts.get(node, 0) + 1
+        line = self.line_of(node)
+        self.line_counts[line] = self.line_counts.get(line, 0) + 1
+        self.running.append((self.current_line, self.child_time, time.perf_counter()))
+        self.current_line, self.child_time = line, 0.0
+
+    def exit(self, node: Node):
+        enclosing_line, enclosing_child_time, start = self.running.pop()
+        elapsed = time.perf_counter() - start
+        line = self.current_line
+        self.line_times[line] = self.line_times.get(line, 0.0) + elapsed - self.child_time
+        self.current_line, self.child_time = enclosing_line, enclosing_child_time + elapsed
+
+    def hot_lines(self) -> List[int]:
+        return sorted(self.line_times, key=lambda line: self.line_times[line], reverse=True)
+
+    def report(self, out: TextIO, source_lines: Optional[List[str]] = None, limit: int = 20):
+        total = sum(self.line_times.values()) or 1.0
+        out.write(f"{'line':>6} {'time ms':>10} {'%':>6} {'count':>10}\n")
+        for line in self.hot_lines()[:limit]:
+            text = ""
+            if source_lines is not None and 0 < line <= len(source_lines):
+                text = "  " + source_lines[line - 1].strip()
+            out.write(f"{line:>6} {self.line_times[line] * 1000:>10.2f} "
+                      f"{self.line_times[line] / total * 100:>6.1f} {self.line_counts[line]:>10}{text}\n")
+
+    def write_json(self, filename: str):
+        data = {
+            "lines": [
+                {"line": line, "time": self.line_times[line], "count": self.line_counts[line]}
+                for line in self.hot_lines()
+            ],
+            "nodes": sorted(
+                ({"line": self.node_lines[node], "kind": type(node).__name__, "count": count}
+                 for node, count in self.node_counts.items()),
+                key=lambda entry: entry["count"], reverse=True
+            ),
+        }
+        with open(filename, "w") as f:
+            json.dump(data, f, indent=2)
@@ -0,0 +1,330 @@
+import enum
+import operator
+from typing import Any, Dict, List, MutableSet, Optional, Tuple
+import attr
+from .ast_rewriter import AstRewriter
+from .expr import Assign, Binary, Call, Expr, ExprVisitor, Get, Grouping, Literal, Logical, Set, Super, This, Unary, Variable
+from .stmt import Block, Break, Class, Expression, Function, If, Import, Print, Return, Stmt, StmtVisitor, Var, While
+from .token_type import TokenType
+from .tokens import Token
+from .typed_expr import TypedBinary, TypedDivide, TypedUnary
+
+
+class LoxType(enum.Enum):
+    ANY, NUMBER, STRING, BOOL, NIL = range(5)
+
+
+# declaring token -> type of the variable at the current program point,
+# variables that are missing are ANY
+State = Dict[Token, LoxType]
+
+NUMBER_OPS = {
+    TokenType.GREATER: operator.gt,
+    TokenType.GREATER_EQUAL: operator.ge,
+    TokenType.LESS: operator.lt,
+    TokenType.LESS_EQUAL: operator.le,
+    TokenType.MINUS: operator.sub,
+    TokenType.PLUS: operator.add,
+    TokenType.SLASH: operator.truediv,
+    TokenType.STAR: operator.mul,
+}
+
+COMPARISONS = (TokenType.GREATER, TokenType.GREATER_EQUAL, TokenType.LESS, TokenType.LESS_EQUAL,
+               TokenType.BANG_EQUAL, TokenType.EQUAL_EQUAL)
+
+
+def join(a: LoxType, b: LoxType) -> LoxType:
+    return a if a is b else LoxType.ANY
+
+
+def join_states(a: State, b: State) -> State:
+    return {decl: join(t, b[decl]) for decl, t in a.items() if decl in b}
+
+
+def type_of(value: Any) -> LoxType:
+    if value is None:
+        return LoxType.NIL
+    if isinstance(value, bool):
+        return LoxType.BOOL
+    if isinstance(value, float):
+        return LoxType.NUMBER
+    if isinstance(value, str):
+        return LoxType.STRING
+    return LoxType.ANY
+
+
+@attr.s(auto_attribs=True)
+class TypeStats:
+    checked: int = 0
+    binary: int = 0
+    unary: int = 0
+
+    @property
+    def eliminated(self) -> int:
+        return self.binary + self.unary
+
+    def __str__(self):
+        return f"eliminated {self.eliminated} of {self.checked} runtime type checks " \
+               f"({self.binary} binary, {self.unary} unary)"
+
+
+@attr.s(auto_attribs=True)
+class TypeInference(ExprVisitor[LoxType], StmtVisitor[None]):
+    """Flow-sensitive inference of local variable types.
+
+    Only variables declared by the function being analyzed are tracked,
+    everything else (globals, captured variables, call results, fields) is ANY.
+    Locals that a nested function assigns to are ANY everywhere, since any call
+    may run that function. Which declaration a name means is the resolver's
+    decision, taken from its distances; inlined code can use a global under
+    the name of a local.
+    """
+    lox_locals: Dict[Expr, int]
+    flat_blocks: MutableSet[Block]
+    # (function level, name -> declaring token), mirrors the resolver's scopes
+    scopes: List[Tuple[int, Dict[str, Token]]] = attr.Factory(list)
+    function_level: int = 0
+    state: State = attr.Factory(dict)
+    break_states: List[State] = attr.Factory(list)
+    unstable: MutableSet[Token] = attr.Factory(set)
+    # operand types of every Binary and Unary seen in the final iteration
+    facts: Dict[Expr, Tuple[LoxType, ...]] = attr.Factory(dict)
+
+    def infer(self, statements: List[Stmt]) -> Dict[Expr, Tuple[LoxType, ...]]:
+        while True:
+            unstable = len(self.unstable)
+            self.facts = {}
+            self.state = {}
+            self.analyze(statements)
+            if len(self.unstable) == unstable:
+                return self.facts
+
+    def analyze(self, statements: List[Stmt]):
+        for statement in statements:
+            statement.accept(self)
+
+    def evaluate(self, expr: Expr) -> LoxType:
+        return expr.accept(self)
+
+    def analyze_function(self, function: Function):
+        enclosing = self.state, self.break_states
+        self.state, self.break_states = {}, []
+        self.function_level += 1
+        self.begin_scope()
+        for param in function.params:
+            self.declare(param)
+        self.analyze(function.body)
+        self.end_scope()
+        self.function_level -= 1
+        self.state, self.break_states = enclosing
+
+    def begin_scope(self):
+        self.scopes.append((self.function_level, {}))
+
+    def end_scope(self):
+        self.scopes.pop()
+
+    def declare(self, name: Token, value: LoxType = LoxType.ANY):
+        if not self.scopes:
+            return
+        self.scopes[-1][1][name.lexeme] = name
+        self.state[name] = value
+
+    def find(self, expr: Expr, name: Token) -> Tuple[Optional[Token], bool]:
+        distance = self.lox_locals.get(expr, None)
+        if distance is None or distance >= len(self.scopes):
+            return None, False
+        level, scope = self.scopes[-1 - distance]
+        return scope.get(name.lexeme, None), level == self.function_level
+
+    def visit_block_stmt(self, stmt: Block):
+        # a flattened block declares into the scope around it, as it does at runtime
+        if stmt in self.flat_blocks:
+            self.analyze(stmt.statements)
+            return
+        self.begin_scope()
+        self.analyze(stmt.statements)
+        self.end_scope()
+
+    def visit_break_stmt(self, stmt: Break):
+        self.break_states.append(dict(self.state))
+
+    def visit_class_stmt(self, stmt: Class):
+        self.declare(stmt.name)
+        if stmt.superclass is not None:
+            self.evaluate(stmt.superclass)
+            self.begin_scope()
+        # `this`, which is never tracked
+        self.begin_scope()
+        for method in stmt.methods:
+            self.analyze_function(method)
+        self.end_scope()
+        if stmt.superclass is not None:
+            self.end_scope()
+
+    def visit_expression_stmt(self, stmt: Expression):
+        self.evaluate(stmt.expression)
+
+    def visit_function_stmt(self, stmt: Function):
+        self.declare(stmt.name)
+        self.analyze_function(stmt)
+
+    def visit_if_stmt(self, stmt: If):
+        self.evaluate(stmt.condition)
+        before = dict(self.state)
+        stmt.then_branch.accept(self)
+        after_then = self.state
+        self.state = before
+        if stmt.else_branch is not None:
+            stmt.else_branch.accept(self)
+        self.state = join_states(after_then, self.state)
+
+    def visit_import_stmt(self, stmt: Import):
+        return
+
+    def visit_print_stmt(self, stmt: Print):
+        self.evaluate(stmt.expression)
+
+    def visit_return_stmt(self, stmt: Return):
+        if stmt.value is not None:
+            self.evaluate(stmt.value)
+
+    def visit_var_stmt(self, stmt: Var):
+        value = LoxType.NIL
+        if stmt.initializer is not None:
+            value = self.evaluate(stmt.initializer)
+        self.declare(stmt.name, value)
+
+    def visit_while_stmt(self, stmt: While):
+        enclosing_breaks = self.break_states
+        # iterate until the state at the loop head stops changing, so the
+        # facts recorded by the last pass hold for every iteration
+        while True:
+            head = dict(self.state)
+            self.break_states = []
+            self.evaluate(stmt.condition)
+            exit_state = dict(self.state)
+            stmt.body.accept(self)
+            merged = join_states(head, self.state)
+            if merged == head:
+                break
+            self.state = merged
+        for state in self.break_states:
+            exit_state = join_states(exit_state, state)
+        self.state = exit_state
+        self.break_states = enclosing_breaks
+
+    def visit_assign_expr(self, expr: Assign) -> LoxType:
+        value = self.evaluate(expr.value)
+        decl, local = self.find(expr, expr.name)
+        if decl is not None:
+            if local:
+                self.state[decl] = value
+            else:
+                self.unstable.add(decl)
+        return value
+
+    def visit_binary_expr(self, expr: Binary) -> LoxType:
+        left = self.evaluate(expr.left)
+        right = self.evaluate(expr.right)
+        self.facts[expr] = (left, right)
+        token_type = expr.operator.token_type
+        if token_type in COMPARISONS:
+            return LoxType.BOOL
+        if token_type == TokenType.PLUS:
+            if left is LoxType.NUMBER and right is LoxType.NUMBER:
+                return LoxType.NUMBER
+            if left is LoxType.STRING or right is LoxType.STRING:
+                return LoxType.STRING
+            return LoxType.ANY
+        # anything else either produces a number or raises
+        return LoxType.NUMBER
+
+    def visit_call_expr(self, expr: Call) -> LoxType:
+        self.evaluate(expr.callee)
+        for argument in expr.arguments:
+            self.evaluate(argument)
+        return LoxType.ANY
+
+    def visit_get_expr(self, expr: Get) -> LoxType:
+        self.evaluate(expr.object)
+        return LoxType.ANY
+
+    def visit_grouping_expr(self, expr: Grouping) -> LoxType:
+        return self.evaluate(expr.expression)
+
+    def visit_literal_expr(self, expr: Literal) -> LoxType:
+        return type_of(expr.value)
+
+    def visit_logical_expr(self, expr: Logical) -> LoxType:
+        left = self.evaluate(expr.left)
+        short_circuit = dict(self.state)
+        right = self.evaluate(expr.right)
+        self.state = join_states(short_circuit, self.state)
+        return join(left, right)
+
+    def visit_set_expr(self, expr: Set) -> LoxType:
+        self.evaluate(expr.object)
+        return self.evaluate(expr.value)
+
+    def visit_super_expr(self, expr: Super) -> LoxType:
+        return LoxType.ANY
+
+    def visit_this_expr(self, expr: This) -> LoxType:
+        return LoxType.ANY
+
+    def visit_unary_expr(self, expr: Unary) -> LoxType:
+        right = self.evaluate(expr.right)
+        self.facts[expr] = (right,)
+        if expr.operator.token_type == TokenType.BANG:
+            return LoxType.BOOL
+        return LoxType.NUMBER
+
+    def visit_variable_expr(self, expr: Variable) -> LoxType:
+        decl, local = self.find(expr, expr.name)
+        if decl is None or not local or decl in self.unstable:
+            return LoxType.ANY
+        return self.state.get(decl, LoxType.ANY)
+
+
+@attr.s(auto_attribs=True)
+class TypeSpecializer(AstRewriter):
+    facts: Dict[Expr, Tuple[LoxType, ...]]
+    stats: TypeStats = attr.Factory(TypeStats)
+
+    def visit_binary_expr(self, expr: Binary) -> Expr:
+        super().visit_binary_expr(expr)
+        token_type = expr.operator.token_type
+        if token_type not in NUMBER_OPS:
+            return expr
+        self.stats.checked += 1
+        left, right = self.facts.get(expr, (LoxType.ANY, LoxType.ANY))
+        numbers = left is LoxType.NUMBER and right is LoxType.NUMBER
+        strings = token_type == TokenType.PLUS and left is LoxType.STRING and right is LoxType.STRING
+        if not numbers and not strings:
+            return expr
+        self.stats.binary += 1
+        if token_type == TokenType.SLASH:
+            return TypedDivide(expr.left, expr.operator, expr.right, NUMBER_OPS[token_type])
+        return TypedBinary(expr.left, expr.operator, expr.right, NUMBER_OPS[token_type])
+
+    def visit_unary_expr(self, expr: Unary) -> Expr:
+        super().visit_unary_expr(expr)
+        self.stats.checked += 1
+        right, = self.facts.get(expr, (LoxType.ANY,))
+        if expr.operator.token_type == TokenType.MINUS and right is LoxType.NUMBER:
+            self.stats.unary += 1
+            return TypedUnary(expr.operator, expr.right, operator.neg)
+        if expr.operator.token_type == TokenType.BANG and right is LoxType.BOOL:
+            self.stats.unary += 1
+            return TypedUnary(expr.operator, expr.right, operator.not_)
+        return expr
+
+
+def specialize_types(statements: List[Stmt], lox_locals: Dict[Expr, int], flat_blocks: MutableSet[Block]) -> TypeStats:
+    """Replaces the operations whose operand types are known with typed
+    ones, given what the resolver reported about `statements`."""
+    facts = TypeInference(lox_locals, flat_blocks).infer(statements)
+    specializer = TypeSpecializer(facts)
+    specializer.rewrite_statements(statements)
+    return specializer.stats
@@ -0,0 +1,42 @@
+from typing import Any, Callable
+from .expr import Binary, Expr, Unary
+from .tokens import Token
+
+
+class TypedBinary(Binary):
+    """A Binary whose operands type inference proved valid for the operator,
+    evaluated without runtime type checks. Visitors without the typed visit
+    methods see it as the plain Binary or Unary it replaced."""
+    def __init__(self, left: Expr, operator: Token, right: Expr, op: Callable[[Any, Any], Any]):
+        super().__init__(left, operator, right)
+        self.op = op
+
+    def accept(self, visitor: "ExprVisitor[R]") -> "R":
+        try:
+            visit = visitor.visit_typed_binary_expr
+        except AttributeError:
+            return visitor.visit_binary_expr(self)
+        return visit(self)
+
+
+class TypedDivide(TypedBinary):
+    """Number division still has to report division by zero."""
+    def accept(self, visitor: "ExprVisitor[R]") -> "R":
+        try:
+            visit = visitor.visit_typed_divide_expr
+        except AttributeError:
+            return visitor.visit_binary_expr(self)
+        return visit(self)
+
+
+class TypedUnary(Unary):
+    def __init__(self, operator: Token, right: Expr, op: Callable[[Any], Any]):
+        super().__init__(operator, right)
+        self.op = op
+
+    def accept(self, visitor: "ExprVisitor[R]") -> "R":
+        try:
+            visit = visitor.visit_typed_unary_expr
+        except AttributeError:
+            return visitor.visit_unary_expr(self)
+        return visit(self)
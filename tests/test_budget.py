@@ -0,0 +1,21 @@
+import time
+
+from lox.budget import Budget
+from lox.lox import Lox
+
+
+def test_timeout_holds_when_steps_are_slow(capsys):
+    lox = Lox()
+    Budget(timeout=0.2).install(lox.interpreter)
+    start = time.monotonic()
+    lox.run("while (true) { FloatArray(200000).sum(); }")
+    assert time.monotonic() - start < 1.0
+    assert lox.had_runtime_error
+    assert "Time limit exceeded." in capsys.readouterr().err
+
+
+def test_step_limit(capsys):
+    lox = Lox()
+    Budget(max_steps=100).install(lox.interpreter)
+    lox.run("var i = 0; while (true) { i = i + 1; }")
+    assert "Step limit exceeded." in capsys.readouterr().err
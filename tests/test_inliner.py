@@ -0,0 +1,52 @@
+from typing import List
+
+from lox.expr import Call, Expr
+from lox.lox import Lox
+from lox.stmt import Function, Return, Stmt
+
+
+def compile_program(source: str, inline: bool = True) -> List[Stmt]:
+    lox = Lox()
+    lox.inline = inline
+    lox.whole_program = True
+    lox.scanner.reset(source)
+    statements = lox.compile(lox.scanner.scan_tokens(), False)
+    assert statements is not None
+    return statements
+
+
+def returned(function: Stmt) -> Expr:
+    assert isinstance(function, Function) and isinstance(function.body[0], Return)
+    return function.body[0].value
+
+
+def test_inlines_whole_program():
+    statements = compile_program("fun sq(x) { return x * x; } fun use() { return sq(3); }")
+    assert not isinstance(returned(statements[1]), Call)
+
+
+def test_kill_switch():
+    statements = compile_program("fun sq(x) { return x * x; } fun use() { return sq(3); }", inline=False)
+    assert isinstance(returned(statements[1]), Call)
+
+
+def test_recursive_function_stays_a_call():
+    statements = compile_program("fun r(x) { return r(x); } fun use(y) { return r(y); }")
+    assert isinstance(returned(statements[1]), Call)
+
+
+def test_reassigned_function_stays_a_call(capsys):
+    source = "fun sq(x) { return x * x; } fun zero(x) { return 0; } fun use() { return sq(3); } sq = zero; print use();"
+    statements = compile_program(source)
+    assert isinstance(returned(statements[2]), Call)
+    lox = Lox()
+    lox.whole_program = True
+    lox.run(source)
+    assert capsys.readouterr().out == "0\n"
+
+
+def test_later_runs_can_redefine(capsys):
+    lox = Lox()
+    lox.run("fun sq(x) { return x * x; } fun use() { return sq(3); } print use();")
+    lox.run("fun sq(x) { return 0; } print use();")
+    assert capsys.readouterr().out == "9\n0\n"
@@ -0,0 +1,53 @@
+from typing import List
+
+from lox.expr import Binary
+from lox.lox import Lox
+from lox.stmt import Function, Return, Stmt
+from lox.typed_expr import TypedBinary
+
+
+def run(source: str, inline: bool = True) -> Lox:
+    lox = Lox()
+    lox.inline = inline
+    lox.whole_program = True
+    lox.run(source)
+    return lox
+
+
+def compile_program(source: str) -> List[Stmt]:
+    lox = Lox()
+    lox.scanner.reset(source)
+    statements = lox.compile(lox.scanner.scan_tokens(), False)
+    assert statements is not None
+    return statements
+
+
+def returned(function: Stmt) -> Binary:
+    assert isinstance(function, Function) and isinstance(function.body[-1], Return)
+    return function.body[-1].value
+
+
+def test_inlined_global_is_not_the_callers_local(capsys):
+    source = 'var k = "s"; fun addk(x) { return x + k; } ' \
+             'fun f() { var k = 1; var y = 2; return addk(y); } print f();'
+    for inline in (True, False):
+        lox = run(source, inline)
+        assert not lox.had_runtime_error
+        assert capsys.readouterr().out == "2.0s\n"
+
+
+def test_numeric_locals_are_specialized():
+    statements = compile_program("fun f() { var a = 1; var b = 2; return a + b; }")
+    assert isinstance(returned(statements[0]), TypedBinary)
+
+
+def test_globals_are_not_specialized():
+    statements = compile_program("var a = 1; fun f() { var b = 2; return a + b; }")
+    assert not isinstance(returned(statements[1]), TypedBinary)
+
+
+def test_locals_in_blocks_and_methods():
+    statements = compile_program(
+        "class A { m() { var a = 1; { var b = 2; { var c = 3; a = b + c; } } return a * 2; } }")
+    method = statements[0].methods[0]
+    assert isinstance(returned(method), TypedBinary)
@@ -85,7 +85,7 @@ if __name__ == '__main__':
         "Unary    : Token operator, Expr right",
         "Variable : Token name"
         ],
-        ["from tokens import Token"]
+        ["from .tokens import Token"]
     )
 
     define_ast(args.output_dir, "Stmt", [
@@ -95,11 +95,12 @@ if __name__ == '__main__':
         "Expression : Expr expression",
         "Function   : Token name, List[Token] params, List[Stmt] body",
         "If         : Expr condition, Stmt then_branch, Optional[Stmt] else_branch",
+        "Import     : Token keyword, Token path",
         "Print      : Expr expression",
         "Return     : Token keyword, Expr value",
         "Var        : Token name, Expr initializer",
-        "While      : Expr condition, Stmt body"
+        "While      : Token keyword, Expr condition, Stmt body"
       ],
-      ["from expr import Expr, Variable",
-      "from tokens import Token"]
+      ["from .expr import Expr, Variable",
+      "from .tokens import Token"]
     )
\ No newline at end of file